@@ -0,0 +1,299 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+from datetime import datetime, timedelta
+
+from backend import crud, crud_async, etags, fieldsets, models, pagination, schemas, search
+from backend.auth import create_access_token, ACCESS_TOKEN_EXPIRE_MINUTES
+from backend.hashing import hash_password_async
+from backend.serialization import FastJSONResponse
+from backend.auth_async import authenticate_user, get_current_active_user
+from config.database import get_async_db
+
+# Coroutine versions of the CRUD and authentication endpoints in
+# backend/main.py, mounted instead of them when DATABASE_MODE=async.
+router = APIRouter()
+
+@router.get("/")
+async def read_root():
+    return {"message": "Order Management API"}
+
+# Authentication endpoints
+@router.post("/register", response_model=schemas.User)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    # Check if user already exists
+    db_user = (await db.execute(select(models.User).where(models.User.username == user.username))).scalar_one_or_none()
+    if db_user:
+        raise HTTPException(
+            status_code=400,
+            detail="Username already registered"
+        )
+
+    # Check if email already exists
+    db_email = (await db.execute(select(models.User).where(models.User.email == user.email))).scalar_one_or_none()
+    if db_email:
+        raise HTTPException(
+            status_code=400,
+            detail="Email already registered"
+        )
+
+    # Create new user
+    hashed_password = await hash_password_async(user.password)
+    db_user = models.User(
+        username=user.username,
+        email=user.email,
+        first_name=user.first_name,
+        last_name=user.last_name,
+        hashed_password=hashed_password
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+@router.post("/login", response_model=schemas.Token)
+async def login_user(user_credentials: schemas.UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user(db, user_credentials.username, user_credentials.password)
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Incorrect username or password",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    access_token = create_access_token(
+        data={"sub": user.username}, expires_delta=access_token_expires
+    )
+    return {
+        "access_token": access_token,
+        "token_type": "bearer",
+        "user": user
+    }
+
+@router.get("/me", response_model=schemas.User)
+async def read_users_me(current_user: schemas.User = Depends(get_current_active_user)):
+    return current_user
+
+@router.post("/orders/", response_model=schemas.Order)
+async def create_order(
+    order: schemas.OrderCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    db_order = await crud_async.create_order(db=db, order=order, user_id=current_user.user_id)
+    return schemas.Order.model_validate(db_order)
+
+@router.get("/orders/", response_model=List[schemas.Order])
+async def read_orders(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort_by: schemas.OrderSortEnum = schemas.OrderSortEnum.ORDER_ID,
+    descending: bool = False,
+    status: Optional[schemas.StatusEnum] = None,
+    company_name: Optional[str] = None,
+    order_date_from: Optional[datetime] = None,
+    order_date_to: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        # e.g. fields=order_id,status for an id picker; include=sub_orders nests them
+        order_fields, included = fieldsets.parse_fieldset(
+            fields, include, crud.ORDER_FIELDS, "order_id", relations=("sub_orders",)
+        )
+        order_rows, sub_order_rows = await crud_async.get_order_rows(
+            db, fields=order_fields, include_sub_orders="sub_orders" in included,
+            skip=skip, limit=limit,
+            cursor=cursor, sort_by=sort_by, descending=descending,
+            status=status, company_name=company_name,
+            order_date_from=order_date_from, order_date_to=order_date_to
+        )
+    except (pagination.InvalidCursor, fieldsets.InvalidFieldset) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    pagination.set_next_cursor(response, order_rows, crud.ORDER_SORT_KEYS[sort_by], sort_by, limit, descending)
+    # Unchanged pages are answered with 304 before any serialization. Pages
+    # are built from plain rows and returned as a response, so FastAPI does
+    # not validate them against response_model (which still documents them).
+    return etags.not_modified(request, response, etags.order_rows_etag(order_rows, sub_order_rows)) or FastJSONResponse(
+        crud.order_dicts(order_rows, sub_order_rows, order_fields, "sub_orders" in included), headers=dict(response.headers)
+    )
+
+async def _read_order_batch(db, ids, fields: Optional[str], include: Optional[str], request: Request, response: Response):
+    order_ids = crud.order_batch_ids(ids)
+    order_fields, included = fieldsets.parse_fieldset(
+        fields, include, crud.ORDER_FIELDS, "order_id", relations=("sub_orders",)
+    )
+    order_rows, sub_order_rows = await crud_async.get_order_rows_by_id(
+        db, order_ids, fields=order_fields, include_sub_orders="sub_orders" in included
+    )
+    found, batch = crud.order_batch(order_ids, order_rows, sub_order_rows, order_fields, "sub_orders" in included)
+    return etags.not_modified(request, response, etags.order_rows_etag(found, sub_order_rows)) or FastJSONResponse(
+        batch, headers=dict(response.headers)
+    )
+
+# Declared before /orders/{order_id}, which would otherwise match "batch"
+@router.get("/orders/batch", response_model=schemas.OrderBatch)
+async def read_order_batch(
+    request: Request,
+    response: Response,
+    ids: str,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Orders for a comma-separated id list, in request order; unknown ids are listed in `missing`."""
+    try:
+        return await _read_order_batch(db, crud.parse_order_ids(ids), fields, include, request, response)
+    except (crud.InvalidOrderBatch, fieldsets.InvalidFieldset) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/orders/batch", response_model=schemas.OrderBatch)
+async def read_order_batch_from_body(
+    batch: schemas.OrderBatchRequest,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """GET /orders/batch for id lists too long for a URL."""
+    try:
+        return await _read_order_batch(db, batch.ids, fields, include, request, response)
+    except (crud.InvalidOrderBatch, fieldsets.InvalidFieldset) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/orders/companies", response_model=List[str])
+async def read_company_names(db: AsyncSession = Depends(get_async_db)):
+    """Distinct company names across all orders, for the company filter."""
+    return await crud_async.get_company_names(db)
+
+@router.get("/orders/{order_id}", response_model=schemas.Order)
+async def read_order(order_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    db_order = await crud_async.get_order(db, order_id=order_id, loader="joined")
+    if db_order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return etags.not_modified(request, response, etags.order_etag(db_order)) or schemas.Order.model_validate(db_order)
+
+@router.put("/orders/{order_id}", response_model=schemas.Order)
+async def update_order(
+    order_id: int,
+    order: schemas.OrderUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    db_order = await crud_async.update_order(db, order_id=order_id, order_update=order, user_id=current_user.user_id)
+    if db_order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return schemas.Order.model_validate(db_order)
+
+@router.delete("/orders/{order_id}")
+async def delete_order(
+    order_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    db_order = await crud_async.delete_order(db, order_id=order_id)
+    if db_order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    return {"message": "Order deleted successfully"}
+
+@router.get("/stats", response_model=schemas.DashboardStats)
+async def read_stats(db: AsyncSession = Depends(get_async_db)):
+    return await crud_async.get_dashboard_stats(db)
+
+@router.get("/search", response_model=List[schemas.OrderSearchResult])
+async def search_orders(
+    q: str,
+    skip: int = Query(0, ge=0, le=search.MAX_SKIP),
+    limit: int = Query(20, ge=1, le=search.MAX_LIMIT),
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Orders whose company, product, molecule or sub-order vendor matches `q`, best match first."""
+    try:
+        order_fields, included = fieldsets.parse_fieldset(
+            fields, include, crud.ORDER_FIELDS, "order_id", relations=("sub_orders",)
+        )
+        order_rows, sub_order_rows = await crud_async.search_order_rows(
+            db, q, fields=order_fields, include_sub_orders="sub_orders" in included, skip=skip, limit=limit
+        )
+    except (search.InvalidSearch, fieldsets.InvalidFieldset) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(crud.search_results(order_rows, sub_order_rows, order_fields, "sub_orders" in included))
+
+@router.get("/orders/{order_id}/sub-orders/", response_model=List[schemas.SubOrder])
+async def read_sub_orders(order_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    sub_order_rows = await crud_async.get_sub_order_rows_for_order(db, order_id=order_id)
+    return etags.not_modified(request, response, etags.sub_orders_etag(sub_order_rows)) or FastJSONResponse(
+        [crud.sub_order_dict(row) for row in sub_order_rows], headers=dict(response.headers)
+    )
+
+@router.get("/sub-orders/", response_model=List[schemas.SubOrder])
+async def read_all_sub_orders(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort_by: schemas.SubOrderSortEnum = schemas.SubOrderSortEnum.SUB_ORDER_ID,
+    descending: bool = False,
+    order_id: Optional[int] = None,
+    status: Optional[schemas.StatusEnum] = None,
+    ingredient_type: Optional[str] = None,
+    sub_order_date_from: Optional[datetime] = None,
+    sub_order_date_to: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    try:
+        sub_order_fields, _ = fieldsets.parse_fieldset(fields, None, crud.SUB_ORDER_FIELDS, "sub_order_id")
+        sub_order_rows = await crud_async.get_sub_order_rows(
+            db, fields=sub_order_fields, skip=skip, limit=limit,
+            cursor=cursor, sort_by=sort_by, descending=descending,
+            order_id=order_id, status=status, ingredient_type=ingredient_type,
+            sub_order_date_from=sub_order_date_from, sub_order_date_to=sub_order_date_to
+        )
+    except (pagination.InvalidCursor, fieldsets.InvalidFieldset) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    pagination.set_next_cursor(response, sub_order_rows, crud.SUB_ORDER_SORT_KEYS[sort_by], sort_by, limit, descending)
+    return etags.not_modified(request, response, etags.sub_orders_etag(sub_order_rows)) or FastJSONResponse(
+        [crud.sub_order_dict(row, sub_order_fields) for row in sub_order_rows], headers=dict(response.headers)
+    )
+
+@router.post("/sub-orders/bulk-update", response_model=schemas.SubOrderBulkUpdateResult)
+async def bulk_update_sub_orders(
+    bulk: schemas.SubOrderBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    try:
+        return await crud_async.bulk_update_sub_orders(db, bulk)
+    except crud.InvalidBulkUpdate as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/sub-orders/{sub_order_id}/status")
+async def update_sub_order_status(sub_order_id: int, status: schemas.StatusEnum, db: AsyncSession = Depends(get_async_db)):
+    db_sub_order = await crud_async.update_sub_order_status(db, sub_order_id=sub_order_id, status=status)
+    if db_sub_order is None:
+        raise HTTPException(status_code=404, detail="Sub-order not found")
+    return {"message": "Sub-order status updated successfully"}
+
+@router.put("/sub-orders/{sub_order_id}", response_model=schemas.SubOrder)
+async def update_sub_order(sub_order_id: int, sub_order: schemas.SubOrderUpdate, db: AsyncSession = Depends(get_async_db)):
+    db_sub_order = await crud_async.update_sub_order(db, sub_order_id=sub_order_id, sub_order_update=sub_order)
+    if db_sub_order is None:
+        raise HTTPException(status_code=404, detail="Sub-order not found")
+    return db_sub_order
+
+@router.get("/sub-orders/{sub_order_id}", response_model=schemas.SubOrder)
+async def read_sub_order(sub_order_id: int, request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
+    db_sub_order = await crud_async.get_sub_order(db, sub_order_id=sub_order_id)
+    if db_sub_order is None:
+        raise HTTPException(status_code=404, detail="Sub-order not found")
+    return etags.not_modified(request, response, etags.sub_order_etag(db_sub_order)) or db_sub_order
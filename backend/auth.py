@@ -5,11 +5,14 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
 from config.database import get_db
+from backend import schemas
+from backend.hashing import hash_password, verify_and_update
+from backend.cache import TTLCache
 from backend.models import User
 
 # Security configuration
@@ -17,19 +20,48 @@ SECRET_KEY = "your-secret-key-here-change-in-production"  # Change this in produ
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-
 # Token scheme
 security = HTTPBearer()
 
+# Resolved users keyed by token subject (username). Entries are detached
+# schemas.User snapshots, so they are safe to share across sessions. Local
+# changes invalidate them straight away; the TTL bounds how long other
+# processes can serve a stale user.
+USER_CACHE_TTL_SECONDS = float(os.getenv("USER_CACHE_TTL_SECONDS", "60"))
+USER_CACHE_MAXSIZE = int(os.getenv("USER_CACHE_MAXSIZE", "1024"))
+user_cache = TTLCache(maxsize=USER_CACHE_MAXSIZE, ttl=USER_CACHE_TTL_SECONDS)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_cached_user(mapper, connection, target):
+    """Drop a user's cache entry when the row changes, including a rename."""
+    history = inspect(target).attrs.username.history
+    usernames = {target.username, *history.deleted}
+    for username in usernames:
+        user_cache.invalidate(username)
+    # Another request may re-cache the old row before this flush commits
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault("stale_usernames", set()).update(usernames)
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_users(session):
+    for username in session.info.pop("stale_usernames", ()):
+        user_cache.invalidate(username)
+
+def cached_user(user: User) -> schemas.User:
+    """Snapshot a user row and cache it under its username."""
+    snapshot = schemas.User.model_validate(user)
+    user_cache.set(user.username, snapshot)
+    return snapshot
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against its hash."""
-    return pwd_context.verify(plain_password, hashed_password)
+    return verify_and_update(plain_password, hashed_password)[0]
 
 def get_password_hash(password: str) -> str:
     """Hash a password."""
-    return pwd_context.hash(password)
+    return hash_password(password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Create a JWT access token."""
@@ -58,14 +90,19 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
     user = db.query(User).filter(User.username == username).first()
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = verify_and_update(password, user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Stored with an outdated bcrypt cost; upgrade it now we know the password
+        user.hashed_password = new_hash
+        db.commit()
     return user
 
 def get_current_user(
     credentials: HTTPAuthorizationCredentials = Depends(security),
     db: Session = Depends(get_db)
-) -> User:
+) -> schemas.User:
     """Get the current authenticated user from JWT token."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -82,13 +119,16 @@ def get_current_user(
     if username is None:
         raise credentials_exception
     
-    user = db.query(User).filter(User.username == username).first()
+    user = user_cache.get(username)
     if user is None:
-        raise credentials_exception
+        db_user = db.query(User).filter(User.username == username).first()
+        if db_user is None:
+            raise credentials_exception
+        user = cached_user(db_user)
     
     return user
 
-def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
+def get_current_active_user(current_user: schemas.User = Depends(get_current_user)) -> schemas.User:
     """Get the current active user."""
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
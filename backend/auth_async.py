@@ -0,0 +1,66 @@
+from typing import Optional
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from config.database import get_async_db
+from backend import schemas
+from backend.auth import cached_user, security, user_cache, verify_token
+from backend.hashing import verify_and_update_async
+from backend.models import User
+
+# Async counterparts of the database-backed helpers in backend/auth.py.
+# Token handling and password hashing are shared with the sync module.
+
+async def get_user_by_username(db: AsyncSession, username: str) -> Optional[User]:
+    """Look up a user by username."""
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalar_one_or_none()
+
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> Optional[User]:
+    """Authenticate a user with username and password."""
+    user = await get_user_by_username(db, username)
+    if not user:
+        return None
+    verified, new_hash = await verify_and_update_async(password, user.hashed_password)
+    if not verified:
+        return None
+    if new_hash:
+        # Stored with an outdated bcrypt cost; upgrade it now we know the password
+        user.hashed_password = new_hash
+        await db.commit()
+    return user
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_async_db)
+) -> schemas.User:
+    """Get the current authenticated user from JWT token."""
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+    payload = verify_token(credentials.credentials)
+    if payload is None:
+        raise credentials_exception
+
+    username: str = payload.get("sub")
+    if username is None:
+        raise credentials_exception
+
+    user = user_cache.get(username)
+    if user is None:
+        db_user = await get_user_by_username(db, username)
+        if db_user is None:
+            raise credentials_exception
+        user = cached_user(db_user)
+
+    return user
+
+async def get_current_active_user(current_user: schemas.User = Depends(get_current_user)) -> schemas.User:
+    """Get the current active user."""
+    if not current_user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return current_user
@@ -0,0 +1,279 @@
+import asyncio
+import json
+import logging
+import os
+import select
+import threading
+import uuid
+from collections import deque
+from typing import Iterable, List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+# Change feed for GET /changes. The CRUD functions record which orders and
+# sub-orders they create, update or delete on their session; once the
+# transaction commits the events are handed to an in-process hub that fans
+# them out to every connected client as server-sent events. Rolled back
+# transactions publish nothing.
+#
+# With CHANGE_FEED_TRANSPORT=notify on PostgreSQL the events travel through
+# NOTIFY instead: they are sent inside the committing transaction (so they are
+# delivered only if it commits) and every worker process LISTENs on
+# CHANGE_FEED_CHANNEL and publishes what it receives to its own hub.
+# Otherwise (the default, and always on SQLite) events only reach clients
+# connected to the worker that made the change.
+#
+# An event names the entity ("order" or "sub_order"), the action and the ids;
+# sub-order events also carry their order ids. An order event covers the
+# sub-orders created, removed or re-dated along with it. Clients fetch the
+# changed rows (e.g. with GET /orders/batch) and patch what they already have.
+
+logger = logging.getLogger(__name__)
+
+# "local" publishes to the in-process hub alone; "notify" opts in to
+# LISTEN/NOTIFY between workers on PostgreSQL
+CHANGE_FEED_TRANSPORT = os.getenv("CHANGE_FEED_TRANSPORT", "local").lower()
+CHANGE_FEED_CHANNEL = os.getenv("CHANGE_FEED_CHANNEL", "order_changes")
+# Recent events kept for clients resuming with Last-Event-ID
+CHANGE_FEED_HISTORY = int(os.getenv("CHANGE_FEED_HISTORY", "1000"))
+# Events buffered per client; a client that falls further behind gets a reset
+CHANGE_FEED_QUEUE_SIZE = int(os.getenv("CHANGE_FEED_QUEUE_SIZE", "1000"))
+CHANGE_FEED_HEARTBEAT_SECONDS = float(os.getenv("CHANGE_FEED_HEARTBEAT_SECONDS", "15"))
+CHANGE_FEED_RECONNECT_SECONDS = float(os.getenv("CHANGE_FEED_RECONNECT_SECONDS", "2"))
+
+# NOTIFY payloads must be shorter than 8000 bytes
+MAX_IDS_PER_EVENT = 250
+PENDING_CHANGES = "pending_changes"
+
+# Tells a client it may have missed events and must refetch what it shows
+RESET = {"type": "reset"}
+
+def uses_notify(dialect: str) -> bool:
+    return dialect == "postgresql" and CHANGE_FEED_TRANSPORT == "notify"
+
+def record(db, entity: str, action: str, ids: Iterable[int], order_ids: Optional[List[int]] = None):
+    """Queue a change on `db` (a Session or AsyncSession); it is published when the transaction commits.
+
+    `order_ids`, for sub-order changes, runs parallel to `ids`. Long id lists
+    are split over several events.
+    """
+    ids = list(ids)
+    pending = db.info.setdefault(PENDING_CHANGES, [])
+    for start in range(0, len(ids), MAX_IDS_PER_EVENT):
+        change = {"entity": entity, "action": action, "ids": ids[start:start + MAX_IDS_PER_EVENT]}
+        if order_ids is not None:
+            change["order_ids"] = sorted(set(order_ids[start:start + MAX_IDS_PER_EVENT]))
+        pending.append(change)
+
+@event.listens_for(Session, "before_commit")
+def _notify_before_commit(session):
+    pending = session.info.get(PENDING_CHANGES)
+    if not pending or not uses_notify(session.get_bind().dialect.name):
+        return
+    # Runs in the greenlet of an AsyncSession too, so the sync API is fine
+    connection = session.connection()
+    for change in pending:
+        connection.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CHANGE_FEED_CHANNEL, "payload": json.dumps(change, separators=(",", ":"))},
+        )
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session):
+    pending = session.info.pop(PENDING_CHANGES, None)
+    if pending and not uses_notify(session.get_bind().dialect.name):
+        for change in pending:
+            hub.publish(change)
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session):
+    session.info.pop(PENDING_CHANGES, None)
+
+class Subscriber:
+    """One client's queue of events; None ends the stream."""
+
+    def __init__(self, queue_size: int):
+        self.queue = asyncio.Queue(maxsize=queue_size)
+
+    def put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            # The client is not keeping up; it has to refetch anyway
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(item if item is None else dict(RESET, id=item["id"], sequence=item["sequence"]))
+
+class ChangeHub:
+    """Fans events out to the subscribers on one event loop.
+
+    Event ids are "<hub instance>-<sequence>", so a client that reconnects to
+    another worker or after a restart is told to reset rather than being
+    replayed the wrong events.
+    """
+
+    def __init__(self, history: int = CHANGE_FEED_HISTORY, queue_size: int = CHANGE_FEED_QUEUE_SIZE):
+        self.instance = uuid.uuid4().hex[:12]
+        self.queue_size = queue_size
+        self.published = 0
+        self._sequence = 0
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self._loop = None
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._subscribers)
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Deliver events on `loop`; until then (scripts, benchmarks) they are dropped."""
+        self._loop = loop
+
+    def publish(self, change: dict):
+        """Broadcast a change; safe to call from any thread."""
+        loop = self._loop
+        if loop is None or loop.is_closed():
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is loop:
+            self._dispatch(change)
+        else:
+            loop.call_soon_threadsafe(self._dispatch, change)
+
+    def _dispatch(self, change: dict):
+        self._sequence += 1
+        self.published += 1
+        item = dict(change, id=f"{self.instance}-{self._sequence}", sequence=self._sequence)
+        if change is not RESET:
+            self._history.append(item)
+        for subscriber in self._subscribers:
+            subscriber.put(item)
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(self.queue_size)
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self._subscribers.discard(subscriber)
+
+    def replay(self, last_event_id: Optional[str]) -> List[dict]:
+        """The events a client that last saw `last_event_id` has missed."""
+        if not last_event_id:
+            return []
+        instance, _, sequence = last_event_id.rpartition("-")
+        oldest = self._history[0]["sequence"] if self._history else self._sequence + 1
+        if instance != self.instance or not sequence.isdigit() or not oldest - 1 <= int(sequence) <= self._sequence:
+            return [dict(RESET, id=f"{self.instance}-{self._sequence}", sequence=self._sequence)]
+        return [item for item in self._history if item["sequence"] > int(sequence)]
+
+    def close(self):
+        """End every open stream (on shutdown)."""
+        for subscriber in self._subscribers:
+            subscriber.put(None)
+
+hub = ChangeHub()
+
+def sse_message(item: dict) -> str:
+    name = item.get("type") or f"{item['entity']}.{item['action']}"
+    data = {key: value for key, value in item.items() if key not in ("id", "sequence", "type")}
+    return f"id: {item['id']}\nevent: {name}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+async def event_stream(change_hub: ChangeHub, last_event_id: Optional[str] = None):
+    """Server-sent events from `change_hub`, starting after `last_event_id`."""
+    # Subscribe before replaying so nothing published in between is lost
+    subscriber = change_hub.subscribe()
+    try:
+        yield f"retry: {int(CHANGE_FEED_RECONNECT_SECONDS * 1000)}\n\n"
+        # Tells clients whether changes made through other workers reach this
+        # stream; when they do not, cached data still needs to expire
+        scope = "all_workers" if listener is not None else "worker"
+        yield f"event: hello\ndata: {json.dumps({'scope': scope})}\n\n"
+        sent = 0
+        for item in change_hub.replay(last_event_id):
+            sent = item["sequence"]
+            yield sse_message(item)
+        while True:
+            try:
+                item = await asyncio.wait_for(subscriber.queue.get(), CHANGE_FEED_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Keeps proxies from closing an idle connection
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                return
+            if item["sequence"] > sent or item.get("type"):
+                sent = item["sequence"]
+                yield sse_message(item)
+    finally:
+        change_hub.unsubscribe(subscriber)
+
+class NotifyListener:
+    """LISTENs on CHANGE_FEED_CHANNEL on a dedicated psycopg2 connection and publishes to the hub."""
+
+    def __init__(self, engine, change_hub: ChangeHub, channel: str = CHANGE_FEED_CHANNEL):
+        self.engine = engine
+        self.hub = change_hub
+        self.channel = channel
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="change-feed-listener", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=CHANGE_FEED_RECONNECT_SECONDS + 5)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self._listen()
+            except Exception as e:
+                logger.warning("Change feed listener disconnected: %s", e)
+            if self._stop.wait(CHANGE_FEED_RECONNECT_SECONDS):
+                return
+            # Notifications sent while disconnected are lost
+            self.hub.publish(RESET)
+
+    def _listen(self):
+        connection = self.engine.raw_connection()
+        # A connection in LISTEN state must not go back to the pool
+        connection.detach()
+        try:
+            dbapi_connection = connection.dbapi_connection
+            # The pre-ping may have begun a transaction; autocommit cannot be set inside one
+            dbapi_connection.rollback()
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f'LISTEN "{self.channel}"')
+            while not self._stop.is_set():
+                if select.select([dbapi_connection], [], [], 1) == ([], [], []):
+                    continue
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    notify = dbapi_connection.notifies.pop(0)
+                    self.hub.publish(json.loads(notify.payload))
+        finally:
+            connection.close()
+
+listener = None
+
+def start_listener(engine):
+    """Start forwarding NOTIFYs to the hub when they are enabled and the database is PostgreSQL."""
+    global listener
+    if listener is None and uses_notify(engine.dialect.name):
+        listener = NotifyListener(engine, hub)
+        listener.start()
+
+def stop_listener():
+    global listener
+    if listener is not None:
+        listener.stop()
+        listener = None
@@ -1,79 +1,417 @@
-from sqlalchemy.orm import Session
-from backend import models, schemas
+import os
+from sqlalchemy import delete, func, insert, literal, select, union_all, update
+from sqlalchemy.orm import Session, joinedload, selectinload
+from backend import changes, models, pagination, schemas, search
+from backend.cache import TTLCache
+from datetime import datetime
+from enum import Enum
 from typing import List, Optional
 
-def get_order(db: Session, order_id: int):
-    return db.query(models.Order).filter(models.Order.order_id == order_id).first()
+# Loading strategies for Order.sub_orders. "selectin" costs one extra
+# "WHERE order_id IN (...)" query per page, which suits list reads; "joined"
+# pulls the sub-orders into the same statement, which suits single-order reads.
+SUB_ORDER_LOADERS = {
+    "selectin": selectinload,
+    "joined": joinedload,
+}
 
-def get_orders(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.Order).offset(skip).limit(limit).all()
+def _with_sub_orders(query, loader: str):
+    if loader not in SUB_ORDER_LOADERS:
+        raise ValueError(f"Unknown sub-order loader: {loader}")
+    return query.options(SUB_ORDER_LOADERS[loader](models.Order.sub_orders))
 
-def create_order(db: Session, order: schemas.OrderCreate):
-    db_order = models.Order(**order.dict())
+# Sort keys accepted by the list endpoints. Each one ends with the primary key
+# so keyset cursors always point at a unique row.
+ORDER_SORT_KEYS = {
+    schemas.OrderSortEnum.ORDER_ID: (models.Order.order_id,),
+    schemas.OrderSortEnum.ORDER_DATE: (models.Order.order_date, models.Order.order_id),
+    schemas.OrderSortEnum.COMPANY_NAME: (models.Order.company_name, models.Order.order_id),
+    schemas.OrderSortEnum.STATUS: (models.Order.status, models.Order.order_id),
+}
+
+SUB_ORDER_SORT_KEYS = {
+    schemas.SubOrderSortEnum.SUB_ORDER_ID: (models.SubOrder.sub_order_id,),
+    schemas.SubOrderSortEnum.ORDER_ID: (models.SubOrder.order_id, models.SubOrder.sub_order_id),
+    schemas.SubOrderSortEnum.INGREDIENT_TYPE: (models.SubOrder.ingredient_type, models.SubOrder.sub_order_id),
+    schemas.SubOrderSortEnum.STATUS: (models.SubOrder.status, models.SubOrder.sub_order_id),
+}
+
+def filter_orders(
+    query,
+    status: Optional[schemas.StatusEnum] = None,
+    company_name: Optional[str] = None,
+    order_date_from: Optional[datetime] = None,
+    order_date_to: Optional[datetime] = None
+):
+    if status is not None:
+        query = query.filter(models.Order.status == status.value)
+    if company_name is not None:
+        query = query.filter(models.Order.company_name == company_name)
+    if order_date_from is not None:
+        query = query.filter(models.Order.order_date >= order_date_from)
+    if order_date_to is not None:
+        query = query.filter(models.Order.order_date <= order_date_to)
+    return query
+
+def filter_sub_orders(
+    query,
+    order_id: Optional[int] = None,
+    status: Optional[schemas.StatusEnum] = None,
+    ingredient_type: Optional[str] = None,
+    sub_order_date_from: Optional[datetime] = None,
+    sub_order_date_to: Optional[datetime] = None
+):
+    if order_id is not None:
+        query = query.filter(models.SubOrder.order_id == order_id)
+    if status is not None:
+        query = query.filter(models.SubOrder.status == status.value)
+    if ingredient_type is not None:
+        query = query.filter(models.SubOrder.ingredient_type == ingredient_type)
+    if sub_order_date_from is not None:
+        query = query.filter(models.SubOrder.sub_order_date >= sub_order_date_from)
+    if sub_order_date_to is not None:
+        query = query.filter(models.SubOrder.sub_order_date <= sub_order_date_to)
+    return query
+
+# Statement builders shared by this module and backend/crud_async.py
+
+def order_statement(order_id: int, loader: str = "joined"):
+    statement = _with_sub_orders(select(models.Order), loader)
+    return statement.where(models.Order.order_id == order_id)
+
+def paginate_orders(
+    statement,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort_by: schemas.OrderSortEnum = schemas.OrderSortEnum.ORDER_ID,
+    descending: bool = False,
+    **filters
+):
+    statement = filter_orders(statement, **filters)
+    return pagination.paginate(
+        statement, ORDER_SORT_KEYS[sort_by], sort_by.value,
+        skip=skip, limit=limit, cursor=cursor, descending=descending
+    )
+
+def paginate_sub_orders(
+    statement,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort_by: schemas.SubOrderSortEnum = schemas.SubOrderSortEnum.SUB_ORDER_ID,
+    descending: bool = False,
+    **filters
+):
+    statement = filter_sub_orders(statement, **filters)
+    return pagination.paginate(
+        statement, SUB_ORDER_SORT_KEYS[sort_by], sort_by.value,
+        skip=skip, limit=limit, cursor=cursor, descending=descending
+    )
+
+def orders_statement(loader: str = "selectin", **options):
+    return paginate_orders(_with_sub_orders(select(models.Order), loader), **options)
+
+def sub_orders_statement(**options):
+    return paginate_sub_orders(select(models.SubOrder), **options)
+
+# Row reads for the list endpoints: plain Core rows holding exactly the
+# response fields (plus modified_date for ETags), turned into dicts without
+# building ORM objects or Pydantic models. `fields` narrows them to a sparse
+# fieldset (see backend/fieldsets.py); the sort key, primary key and
+# modified_date columns are selected anyway for cursors and ETags.
+
+ORDER_FIELDS = [name for name in schemas.Order.model_fields if name != "sub_orders"]
+SUB_ORDER_FIELDS = list(schemas.SubOrder.model_fields)
+
+def _projection(model, fields, internal_columns):
+    names = dict.fromkeys([*fields, *(column.key for column in internal_columns)])
+    return [getattr(model, name) for name in names]
+
+def order_rows_statement(fields=ORDER_FIELDS, **options):
+    sort_by = options.get("sort_by", schemas.OrderSortEnum.ORDER_ID)
+    internal = (*ORDER_SORT_KEYS[sort_by], models.Order.order_id, models.Order.modified_date)
+    return paginate_orders(select(*_projection(models.Order, fields, internal)), **options)
+
+def sub_order_rows_statement(fields=SUB_ORDER_FIELDS, **options):
+    sort_by = options.get("sort_by", schemas.SubOrderSortEnum.SUB_ORDER_ID)
+    internal = (*SUB_ORDER_SORT_KEYS[sort_by], models.SubOrder.sub_order_id, models.SubOrder.modified_date)
+    return paginate_sub_orders(select(*_projection(models.SubOrder, fields, internal)), **options)
+
+def sub_order_rows_for_orders_statement(order_ids):
+    columns = [getattr(models.SubOrder, name) for name in SUB_ORDER_FIELDS]
+    return (
+        select(*columns, models.SubOrder.modified_date)
+        .where(models.SubOrder.order_id.in_(order_ids))
+        .order_by(models.SubOrder.order_id, models.SubOrder.sub_order_id)
+    )
+
+def sub_order_dict(row, fields=SUB_ORDER_FIELDS) -> dict:
+    return {name: getattr(row, name) for name in fields}
+
+def order_dicts(order_rows, sub_order_rows, fields=ORDER_FIELDS, include_sub_orders: bool = True) -> List[dict]:
+    """Nest sub-order rows under their order rows, shaped like schemas.Order."""
+    orders = []
+    by_id = {}
+    for row in order_rows:
+        order = {name: getattr(row, name) for name in fields}
+        if include_sub_orders:
+            order["sub_orders"] = by_id[row.order_id] = []
+        orders.append(order)
+    for row in sub_order_rows:
+        by_id[row.order_id].append(sub_order_dict(row))
+    return orders
+
+# Batch reads by id: one IN query for the orders plus one for their
+# sub-orders, however many ids are asked for
+ORDER_BATCH_MAX_IDS = int(os.getenv("ORDER_BATCH_MAX_IDS", "500"))
+
+class InvalidOrderBatch(ValueError):
+    """Raised when a batch read names no orders, too many, or ids that are not integers."""
+
+def parse_order_ids(text: str) -> List[int]:
+    try:
+        return [int(part) for part in text.split(",") if part.strip()]
+    except ValueError:
+        raise InvalidOrderBatch("ids must be a comma-separated list of integers")
+
+def order_batch_ids(ids) -> List[int]:
+    """The requested ids without duplicates, in request order."""
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise InvalidOrderBatch("No order ids given")
+    if len(ids) > ORDER_BATCH_MAX_IDS:
+        raise InvalidOrderBatch(f"At most {ORDER_BATCH_MAX_IDS} order ids per request")
+    return ids
+
+def order_rows_by_id_statement(order_ids, fields=ORDER_FIELDS):
+    internal = (models.Order.order_id, models.Order.modified_date)
+    return select(*_projection(models.Order, fields, internal)).where(models.Order.order_id.in_(order_ids))
+
+def order_batch(order_ids, order_rows, sub_order_rows, fields=ORDER_FIELDS, include_sub_orders: bool = True):
+    """The found order rows in request order, their response dicts and the missing ids."""
+    by_id = {row.order_id: row for row in order_rows}
+    found = [by_id[order_id] for order_id in order_ids if order_id in by_id]
+    return found, {
+        "orders": order_dicts(found, sub_order_rows, fields, include_sub_orders),
+        "missing": [order_id for order_id in order_ids if order_id not in by_id],
+    }
+
+def search_order_rows_statement(dialect: str, q: str, fields=ORDER_FIELDS, skip: int = 0, limit: int = 20):
+    internal = (models.Order.order_id, models.Order.modified_date)
+    return search.search_statement(dialect, q, _projection(models.Order, fields, internal), skip=skip, limit=limit)
+
+def search_results(order_rows, sub_order_rows, fields=ORDER_FIELDS, include_sub_orders: bool = True) -> List[dict]:
+    """order_dicts for ranked search rows, each with its score."""
+    orders = order_dicts(order_rows, sub_order_rows, fields, include_sub_orders)
+    for order, row in zip(orders, order_rows):
+        order["score"] = round(row.score, 4)
+    return orders
+
+def existing_ingredients_statement(order_id: int):
+    return select(models.SubOrder.ingredient_type).where(models.SubOrder.order_id == order_id)
+
+def delete_sub_orders_statement(order_id: int, ingredient_types=None):
+    statement = delete(models.SubOrder).where(models.SubOrder.order_id == order_id)
+    if ingredient_types is not None:
+        statement = statement.where(models.SubOrder.ingredient_type.in_(ingredient_types))
+    return statement
+
+def sync_main_order_date_statement(order_id: int, previous_order_date, order_date):
+    """Move sub-orders that still mirror the old order date to the new one."""
+    return (
+        update(models.SubOrder)
+        .where(
+            models.SubOrder.order_id == order_id,
+            models.SubOrder.main_order_date == previous_order_date
+        )
+        .values(main_order_date=order_date)
+    )
+
+def company_names_statement():
+    # Answered from a company_name index without reading the table
+    return select(models.Order.company_name).distinct().order_by(models.Order.company_name)
+
+def dashboard_stats_statement():
+    return union_all(
+        select(literal("orders_by_status").label("kind"), models.Order.status.label("key"), func.count().label("total"))
+        .group_by(models.Order.status),
+        select(literal("sub_orders_by_status"), models.SubOrder.status, func.count())
+        .group_by(models.SubOrder.status),
+        select(literal("sub_orders_by_ingredient"), models.SubOrder.ingredient_type, func.count())
+        .group_by(models.SubOrder.ingredient_type),
+    )
+
+def dashboard_stats_from_rows(rows) -> schemas.DashboardStats:
+    counts = {"orders_by_status": {}, "sub_orders_by_status": {}, "sub_orders_by_ingredient": {}}
+    for kind, key, total in rows:
+        counts[kind][key] = total
+    return schemas.DashboardStats(
+        total_orders=sum(counts["orders_by_status"].values()),
+        total_sub_orders=sum(counts["sub_orders_by_status"].values()),
+        **counts
+    )
+
+def get_company_names(db: Session) -> List[str]:
+    return db.execute(company_names_statement()).scalars().all()
+
+def get_order(db: Session, order_id: int, loader: str = "joined"):
+    return db.execute(order_statement(order_id, loader)).unique().scalar_one_or_none()
+
+def get_orders(db: Session, skip: int = 0, limit: int = 100, loader: str = "selectin", **options):
+    statement = orders_statement(skip=skip, limit=limit, loader=loader, **options)
+    return db.execute(statement).unique().scalars().all()
+
+def get_order_rows(db: Session, include_sub_orders: bool = True, **options):
+    """A page of order rows plus the sub-order rows that belong to them."""
+    order_rows = db.execute(order_rows_statement(**options)).all()
+    if not order_rows or not include_sub_orders:
+        return order_rows, []
+    statement = sub_order_rows_for_orders_statement([row.order_id for row in order_rows])
+    return order_rows, db.execute(statement).all()
+
+def get_order_rows_by_id(db: Session, order_ids, fields=ORDER_FIELDS, include_sub_orders: bool = True):
+    """Order rows for `order_ids` (in no particular order) plus their sub-order rows."""
+    order_rows = db.execute(order_rows_by_id_statement(order_ids, fields)).all()
+    if not order_rows or not include_sub_orders:
+        return order_rows, []
+    statement = sub_order_rows_for_orders_statement([row.order_id for row in order_rows])
+    return order_rows, db.execute(statement).all()
+
+def search_order_rows(db: Session, q: str, fields=ORDER_FIELDS, include_sub_orders: bool = True,
+                      skip: int = 0, limit: int = 20):
+    """The best matching order rows for `q`, best first, plus their sub-order rows."""
+    statement = search_order_rows_statement(db.get_bind().dialect.name, q, fields, skip, limit)
+    order_rows = db.execute(statement).all()
+    if not order_rows or not include_sub_orders:
+        return order_rows, []
+    statement = sub_order_rows_for_orders_statement([row.order_id for row in order_rows])
+    return order_rows, db.execute(statement).all()
+
+INGREDIENT_FIELDS = ('carton', 'label', 'rm', 'sterios', 'bottles', 'm_cups', 'caps', 'shippers')
+
+def new_order_values(order: schemas.OrderCreate, user_id: Optional[int] = None) -> dict:
+    """Column values for a new order, with enums unwrapped for bulk inserts."""
+    values = {
+        field: value.value if isinstance(value, Enum) else value
+        for field, value in order.dict().items()
+    }
+    if values["order_date"] is None:
+        values["order_date"] = datetime.utcnow()
+    values["created_by"] = user_id
+    values["modified_by"] = user_id
+    return values
+
+def new_sub_order_values(order_id: int, order_values: dict, user_id: Optional[int] = None) -> List[dict]:
+    """Column values for the sub-orders of every ingredient marked as 'Y'."""
+    return [
+        {
+            "order_id": order_id,
+            "ingredient_type": ingredient_name,
+            "status": "Open",
+            "main_order_date": order_values["order_date"],
+            "created_by": user_id
+        }
+        for ingredient_name in INGREDIENT_FIELDS
+        if order_values[ingredient_name] == "Y"
+    ]
+
+def create_order(db: Session, order: schemas.OrderCreate, user_id: Optional[int] = None):
+    order_values = new_order_values(order, user_id)
+    db_order = models.Order(**order_values)
     db.add(db_order)
-    db.commit()
-    db.refresh(db_order)
+    db.flush()
     
     # Create sub-orders for ingredients marked as 'Y'
-    ingredients = {
-        'carton': order.carton,
-        'label': order.label,
-        'rm': order.rm,
-        'sterios': order.sterios,
-        'bottles': order.bottles,
-        'm_cups': order.m_cups,
-        'caps': order.caps,
-        'shippers': order.shippers
-    }
-    
-    for ingredient_name, ingredient_value in ingredients.items():
-        if ingredient_value == "Y":
-            sub_order = models.SubOrder(
-                order_id=db_order.order_id,
-                ingredient_type=ingredient_name,
-                status="Open",
-                main_order_date=db_order.order_date
-            )
-            db.add(sub_order)
+    for sub_order_values in new_sub_order_values(db_order.order_id, order_values, user_id):
+        db.add(models.SubOrder(**sub_order_values))
     
+    changes.record(db, "order", "created", [db_order.order_id])
     db.commit()
     db.refresh(db_order)
     return db_order
 
-def update_order(db: Session, order_id: int, order_update: schemas.OrderUpdate):
+def bulk_create_orders(db: Session, orders: List[schemas.OrderCreate], user_id: Optional[int] = None) -> List[int]:
+    """Insert a batch of orders and their sub-orders with multi-row INSERTs.
+
+    Issues one INSERT ... RETURNING for the orders and one INSERT for all of
+    their sub-orders, then commits once. Returns the new order ids in input
+    order.
+    """
+    if not orders:
+        return []
+    order_rows = [new_order_values(order, user_id) for order in orders]
+    order_ids = db.execute(
+        insert(models.Order).returning(models.Order.order_id, sort_by_parameter_order=True),
+        order_rows
+    ).scalars().all()
+    
+    sub_order_rows = [
+        sub_order_values
+        for order_id, order_values in zip(order_ids, order_rows)
+        for sub_order_values in new_sub_order_values(order_id, order_values, user_id)
+    ]
+    if sub_order_rows:
+        db.execute(insert(models.SubOrder), sub_order_rows)
+    
+    changes.record(db, "order", "created", order_ids)
+    db.commit()
+    return order_ids
+
+def sub_order_changes(db_order: models.Order, existing, user_id: Optional[int] = None):
+    """Work out which sub-orders to delete and create for an order's ingredients.
+
+    Returns the ingredient types whose sub-orders should be removed and the
+    new SubOrder objects to add, given the ingredient types that already
+    have a sub-order.
+    """
+    wanted = {name for name in INGREDIENT_FIELDS if getattr(db_order, name) == "Y"}
+    removed = set(existing) - wanted
+    added = [
+        models.SubOrder(
+            order_id=db_order.order_id,
+            ingredient_type=ingredient_name,
+            status="Open",
+            main_order_date=db_order.order_date,
+            created_by=user_id
+        )
+        for ingredient_name in INGREDIENT_FIELDS
+        if ingredient_name in wanted and ingredient_name not in existing
+    ]
+    return removed, added
+
+def reconcile_sub_orders(db: Session, db_order: models.Order, user_id: Optional[int] = None):
+    """Align an order's sub-orders with the ingredients currently marked 'Y'.
+
+    Only ingredients that became 'Y' get a new sub-order and only those that
+    stopped being 'Y' lose theirs; every other sub-order row, with its vendor,
+    designer and approval details, is left untouched. Nothing is committed.
+    """
+    existing = set(db.execute(existing_ingredients_statement(db_order.order_id)).scalars())
+    removed, added = sub_order_changes(db_order, existing, user_id)
+    if removed:
+        db.execute(delete_sub_orders_statement(db_order.order_id, removed))
+    db.add_all(added)
+
+def update_order(db: Session, order_id: int, order_update: schemas.OrderUpdate, user_id: Optional[int] = None):
     db_order = db.query(models.Order).filter(models.Order.order_id == order_id).first()
     if db_order:
+        previous_order_date = db_order.order_date
         update_data = order_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_order, field, value)
+        if user_id is not None:
+            db_order.modified_by = user_id
         
-        # Handle ingredient changes - remove old sub-orders and create new ones if needed
-        if any(field in update_data for field in ['carton', 'label', 'rm', 'sterios', 'bottles', 'm_cups', 'caps', 'shippers']):
-            # Remove existing sub-orders
-            db.query(models.SubOrder).filter(models.SubOrder.order_id == order_id).delete()
-            
-            # Create new sub-orders based on updated ingredients
-            ingredients = {
-                'carton': getattr(db_order, 'carton'),
-                'label': getattr(db_order, 'label'),
-                'rm': getattr(db_order, 'rm'),
-                'sterios': getattr(db_order, 'sterios'),
-                'bottles': getattr(db_order, 'bottles'),
-                'm_cups': getattr(db_order, 'm_cups'),
-                'caps': getattr(db_order, 'caps'),
-                'shippers': getattr(db_order, 'shippers')
-            }
-            
-            for ingredient_name, ingredient_value in ingredients.items():
-                if ingredient_value == "Y":
-                    sub_order = models.SubOrder(
-                        order_id=db_order.order_id,
-                        ingredient_type=ingredient_name,
-                        status="Open",
-                        main_order_date=db_order.order_date
-                    )
-                    db.add(sub_order)
+        # Keep sub-orders that still mirror the order date in step with it
+        if "order_date" in update_data and db_order.order_date != previous_order_date:
+            db.execute(sync_main_order_date_statement(order_id, previous_order_date, db_order.order_date))
         
+        # Handle ingredient changes - add or remove only the affected sub-orders
+        if any(field in update_data for field in INGREDIENT_FIELDS):
+            reconcile_sub_orders(db, db_order, user_id)
+        
+        changes.record(db, "order", "updated", [order_id])
         db.commit()
         db.refresh(db_order)
     return db_order
@@ -84,19 +422,27 @@ def delete_order(db: Session, order_id: int):
         # Delete associated sub-orders first
         db.query(models.SubOrder).filter(models.SubOrder.order_id == order_id).delete()
         db.delete(db_order)
+        changes.record(db, "order", "deleted", [order_id])
         db.commit()
     return db_order
 
 def get_sub_orders(db: Session, order_id: int):
     return db.query(models.SubOrder).filter(models.SubOrder.order_id == order_id).all()
 
-def get_all_sub_orders(db: Session, skip: int = 0, limit: int = 100):
-    return db.query(models.SubOrder).offset(skip).limit(limit).all()
+def get_all_sub_orders(db: Session, skip: int = 0, limit: int = 100, **options):
+    return db.execute(sub_orders_statement(skip=skip, limit=limit, **options)).scalars().all()
+
+def get_sub_order_rows(db: Session, **options):
+    return db.execute(sub_order_rows_statement(**options)).all()
+
+def get_sub_order_rows_for_order(db: Session, order_id: int):
+    return db.execute(sub_order_rows_for_orders_statement([order_id])).all()
 
 def update_sub_order_status(db: Session, sub_order_id: int, status: schemas.StatusEnum):
     db_sub_order = db.query(models.SubOrder).filter(models.SubOrder.sub_order_id == sub_order_id).first()
     if db_sub_order:
         db_sub_order.status = status
+        changes.record(db, "sub_order", "updated", [sub_order_id], [db_sub_order.order_id])
         db.commit()
         db.refresh(db_sub_order)
     return db_sub_order
@@ -110,6 +456,111 @@ def update_sub_order(db: Session, sub_order_id: int, sub_order_update: schemas.S
         update_data = sub_order_update.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_sub_order, field, value)
+        changes.record(db, "sub_order", "updated", [sub_order_id], [db_sub_order.order_id])
         db.commit()
         db.refresh(db_sub_order)
-    return db_sub_order
\ No newline at end of file
+    return db_sub_order
+
+# Bulk sub-order updates run as one UPDATE ... WHERE ... RETURNING in a
+# single transaction instead of a SELECT/UPDATE/COMMIT/refresh per row
+BULK_UPDATE_MAX_SUB_ORDERS = int(os.getenv("BULK_UPDATE_MAX_SUB_ORDERS", "1000"))
+
+class InvalidBulkUpdate(ValueError):
+    """Raised when a bulk update has no valid changes or does not say which sub-orders to change."""
+
+def bulk_update_values(bulk: schemas.SubOrderBulkUpdate) -> dict:
+    values = {
+        field: value.value if isinstance(value, Enum) else value
+        for field, value in bulk.changes.dict(exclude_unset=True).items()
+    }
+    if not values:
+        raise InvalidBulkUpdate("No changes given")
+    # An explicit null would otherwise reach the database as an IntegrityError
+    columns = models.SubOrder.__table__.columns
+    not_null = sorted(field for field, value in values.items() if value is None and not columns[field].nullable)
+    if not_null:
+        raise InvalidBulkUpdate(f"{', '.join(not_null)} cannot be null")
+    return values
+
+def bulk_update_filter_statement(bulk: schemas.SubOrderBulkUpdate):
+    """Ids a filter selects, at most one past the cap; None when ids are given.
+
+    Filters are resolved to ids first, so a broad filter is rejected instead
+    of rewriting (and returning) an unbounded number of rows.
+    """
+    bulk_update_values(bulk)
+    if bulk.sub_order_ids is not None:
+        if bulk.filter is not None:
+            raise InvalidBulkUpdate("Give either sub_order_ids or filter, not both")
+        return None
+    filters = bulk.filter.dict(exclude_none=True) if bulk.filter is not None else {}
+    if not filters:
+        # An empty filter would update every sub-order
+        raise InvalidBulkUpdate("Give sub_order_ids or at least one filter")
+    statement = select(models.SubOrder.sub_order_id).order_by(models.SubOrder.sub_order_id)
+    return filter_sub_orders(statement, **filters).limit(BULK_UPDATE_MAX_SUB_ORDERS + 1)
+
+def bulk_update_target_ids(bulk: schemas.SubOrderBulkUpdate, filtered_ids=None) -> set:
+    """The sub-order ids to update: the requested ones, or those a filter matched."""
+    ids = set(bulk.sub_order_ids if filtered_ids is None else filtered_ids)
+    if filtered_ids is None and not ids:
+        raise InvalidBulkUpdate("sub_order_ids is empty")
+    if len(ids) > BULK_UPDATE_MAX_SUB_ORDERS:
+        if filtered_ids is None:
+            raise InvalidBulkUpdate(f"At most {BULK_UPDATE_MAX_SUB_ORDERS} sub_order_ids per request")
+        raise InvalidBulkUpdate(
+            f"The filter matches more than {BULK_UPDATE_MAX_SUB_ORDERS} sub-orders; narrow it or give sub_order_ids"
+        )
+    return ids
+
+def bulk_update_sub_orders_statement(bulk: schemas.SubOrderBulkUpdate, filtered_ids=None):
+    """UPDATE ... RETURNING for the targeted sub-orders; `filtered_ids` are what bulk_update_filter_statement found."""
+    ids = bulk_update_target_ids(bulk, filtered_ids)
+    columns = [getattr(models.SubOrder, name) for name in SUB_ORDER_FIELDS]
+    return (
+        update(models.SubOrder)
+        .values(**bulk_update_values(bulk))
+        .where(models.SubOrder.sub_order_id.in_(ids))
+        .returning(*columns)
+        .execution_options(synchronize_session=False)
+    )
+
+def bulk_update_result(bulk: schemas.SubOrderBulkUpdate, rows) -> schemas.SubOrderBulkUpdateResult:
+    """Per-id outcome, in request order for ids and by sub_order_id for filters."""
+    updated = {row.sub_order_id: sub_order_dict(row) for row in rows}
+    if bulk.sub_order_ids is not None:
+        ids = list(dict.fromkeys(bulk.sub_order_ids))
+    else:
+        ids = sorted(updated)
+    return schemas.SubOrderBulkUpdateResult(
+        updated=len(updated),
+        not_found=len(ids) - len(updated),
+        results=[
+            schemas.SubOrderBulkUpdateItem(sub_order_id=i, updated=i in updated, sub_order=updated.get(i))
+            for i in ids
+        ],
+    )
+
+def record_bulk_update(db, rows):
+    """Queue the change event for the sub-order rows a bulk update returned."""
+    changes.record(db, "sub_order", "updated", [row.sub_order_id for row in rows], [row.order_id for row in rows])
+
+def bulk_update_sub_orders(db: Session, bulk: schemas.SubOrderBulkUpdate) -> schemas.SubOrderBulkUpdateResult:
+    statement = bulk_update_filter_statement(bulk)
+    filtered_ids = db.execute(statement).scalars().all() if statement is not None else None
+    rows = db.execute(bulk_update_sub_orders_statement(bulk, filtered_ids)).all()
+    record_bulk_update(db, rows)
+    db.commit()
+    return bulk_update_result(bulk, rows)
+
+# Dashboard statistics are recomputed at most once per TTL window
+STATS_CACHE_TTL_SECONDS = float(os.getenv("STATS_CACHE_TTL_SECONDS", "5"))
+stats_cache = TTLCache(maxsize=1, ttl=STATS_CACHE_TTL_SECONDS)
+
+def get_dashboard_stats(db: Session) -> schemas.DashboardStats:
+    """Count orders and sub-orders per status and ingredient in one round trip."""
+    stats = stats_cache.get("stats")
+    if stats is None:
+        stats = dashboard_stats_from_rows(db.execute(dashboard_stats_statement()))
+        stats_cache.set("stats", stats)
+    return stats
@@ -0,0 +1,185 @@
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend import changes, models, schemas
+from backend.crud import (
+    INGREDIENT_FIELDS,
+    ORDER_FIELDS,
+    bulk_update_filter_statement,
+    bulk_update_result,
+    bulk_update_sub_orders_statement,
+    company_names_statement,
+    dashboard_stats_from_rows,
+    dashboard_stats_statement,
+    delete_sub_orders_statement,
+    existing_ingredients_statement,
+    new_order_values,
+    new_sub_order_values,
+    order_rows_by_id_statement,
+    order_rows_statement,
+    order_statement,
+    orders_statement,
+    record_bulk_update,
+    search_order_rows_statement,
+    stats_cache,
+    sub_order_changes,
+    sub_order_rows_for_orders_statement,
+    sub_order_rows_statement,
+    sub_orders_statement,
+    sync_main_order_date_statement,
+)
+from typing import List, Optional
+
+# Async counterparts of backend/crud.py. The statements are shared with the
+# sync module; relationships are always eager loaded because an AsyncSession
+# cannot lazy load.
+
+async def get_order(db: AsyncSession, order_id: int, loader: str = "joined"):
+    result = await db.execute(order_statement(order_id, loader))
+    return result.unique().scalar_one_or_none()
+
+async def get_orders(db: AsyncSession, skip: int = 0, limit: int = 100, loader: str = "selectin", **options):
+    result = await db.execute(orders_statement(skip=skip, limit=limit, loader=loader, **options))
+    return result.unique().scalars().all()
+
+async def get_order_rows(db: AsyncSession, include_sub_orders: bool = True, **options):
+    """A page of order rows plus the sub-order rows that belong to them."""
+    order_rows = (await db.execute(order_rows_statement(**options))).all()
+    if not order_rows or not include_sub_orders:
+        return order_rows, []
+    statement = sub_order_rows_for_orders_statement([row.order_id for row in order_rows])
+    return order_rows, (await db.execute(statement)).all()
+
+async def get_order_rows_by_id(db: AsyncSession, order_ids, fields=ORDER_FIELDS, include_sub_orders: bool = True):
+    """Order rows for `order_ids` (in no particular order) plus their sub-order rows."""
+    order_rows = (await db.execute(order_rows_by_id_statement(order_ids, fields))).all()
+    if not order_rows or not include_sub_orders:
+        return order_rows, []
+    statement = sub_order_rows_for_orders_statement([row.order_id for row in order_rows])
+    return order_rows, (await db.execute(statement)).all()
+
+async def search_order_rows(db: AsyncSession, q: str, fields=ORDER_FIELDS, include_sub_orders: bool = True,
+                            skip: int = 0, limit: int = 20):
+    """The best matching order rows for `q`, best first, plus their sub-order rows."""
+    statement = search_order_rows_statement(db.get_bind().dialect.name, q, fields, skip, limit)
+    order_rows = (await db.execute(statement)).all()
+    if not order_rows or not include_sub_orders:
+        return order_rows, []
+    statement = sub_order_rows_for_orders_statement([row.order_id for row in order_rows])
+    return order_rows, (await db.execute(statement)).all()
+
+async def _reload_order(db: AsyncSession, order_id: int):
+    statement = order_statement(order_id, "selectin").execution_options(populate_existing=True)
+    result = await db.execute(statement)
+    return result.scalar_one()
+
+async def create_order(db: AsyncSession, order: schemas.OrderCreate, user_id: Optional[int] = None):
+    order_values = new_order_values(order, user_id)
+    db_order = models.Order(**order_values)
+    db.add(db_order)
+    await db.flush()
+
+    # Create sub-orders for ingredients marked as 'Y'
+    for sub_order_values in new_sub_order_values(db_order.order_id, order_values, user_id):
+        db.add(models.SubOrder(**sub_order_values))
+
+    changes.record(db, "order", "created", [db_order.order_id])
+    await db.commit()
+    return await _reload_order(db, db_order.order_id)
+
+async def reconcile_sub_orders(db: AsyncSession, db_order: models.Order, user_id: Optional[int] = None):
+    """Align an order's sub-orders with the ingredients currently marked 'Y'."""
+    existing = set((await db.execute(existing_ingredients_statement(db_order.order_id))).scalars())
+    removed, added = sub_order_changes(db_order, existing, user_id)
+    if removed:
+        await db.execute(delete_sub_orders_statement(db_order.order_id, removed))
+    db.add_all(added)
+
+async def update_order(db: AsyncSession, order_id: int, order_update: schemas.OrderUpdate, user_id: Optional[int] = None):
+    db_order = await db.get(models.Order, order_id)
+    if db_order:
+        previous_order_date = db_order.order_date
+        update_data = order_update.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_order, field, value)
+        if user_id is not None:
+            db_order.modified_by = user_id
+
+        # Keep sub-orders that still mirror the order date in step with it
+        if "order_date" in update_data and db_order.order_date != previous_order_date:
+            await db.execute(sync_main_order_date_statement(order_id, previous_order_date, db_order.order_date))
+
+        # Handle ingredient changes - add or remove only the affected sub-orders
+        if any(field in update_data for field in INGREDIENT_FIELDS):
+            await reconcile_sub_orders(db, db_order, user_id)
+
+        changes.record(db, "order", "updated", [order_id])
+        await db.commit()
+        db_order = await _reload_order(db, order_id)
+    return db_order
+
+async def delete_order(db: AsyncSession, order_id: int):
+    db_order = await db.get(models.Order, order_id)
+    if db_order:
+        # Delete associated sub-orders first. The order row is deleted with a
+        # statement too, as a unit-of-work delete would lazy load sub_orders.
+        await db.execute(delete_sub_orders_statement(order_id))
+        await db.execute(delete(models.Order).where(models.Order.order_id == order_id))
+        changes.record(db, "order", "deleted", [order_id])
+        await db.commit()
+    return db_order
+
+async def get_sub_orders(db: AsyncSession, order_id: int):
+    result = await db.execute(select(models.SubOrder).where(models.SubOrder.order_id == order_id))
+    return result.scalars().all()
+
+async def get_all_sub_orders(db: AsyncSession, skip: int = 0, limit: int = 100, **options):
+    result = await db.execute(sub_orders_statement(skip=skip, limit=limit, **options))
+    return result.scalars().all()
+
+async def get_sub_order_rows(db: AsyncSession, **options):
+    return (await db.execute(sub_order_rows_statement(**options))).all()
+
+async def get_sub_order_rows_for_order(db: AsyncSession, order_id: int):
+    return (await db.execute(sub_order_rows_for_orders_statement([order_id]))).all()
+
+async def bulk_update_sub_orders(db: AsyncSession, bulk: schemas.SubOrderBulkUpdate) -> schemas.SubOrderBulkUpdateResult:
+    statement = bulk_update_filter_statement(bulk)
+    filtered_ids = (await db.execute(statement)).scalars().all() if statement is not None else None
+    rows = (await db.execute(bulk_update_sub_orders_statement(bulk, filtered_ids))).all()
+    record_bulk_update(db, rows)
+    await db.commit()
+    return bulk_update_result(bulk, rows)
+
+async def update_sub_order_status(db: AsyncSession, sub_order_id: int, status: schemas.StatusEnum):
+    db_sub_order = await db.get(models.SubOrder, sub_order_id)
+    if db_sub_order:
+        db_sub_order.status = status
+        changes.record(db, "sub_order", "updated", [sub_order_id], [db_sub_order.order_id])
+        await db.commit()
+        await db.refresh(db_sub_order)
+    return db_sub_order
+
+async def get_sub_order(db: AsyncSession, sub_order_id: int):
+    return await db.get(models.SubOrder, sub_order_id)
+
+async def update_sub_order(db: AsyncSession, sub_order_id: int, sub_order_update: schemas.SubOrderUpdate):
+    db_sub_order = await db.get(models.SubOrder, sub_order_id)
+    if db_sub_order:
+        update_data = sub_order_update.dict(exclude_unset=True)
+        for field, value in update_data.items():
+            setattr(db_sub_order, field, value)
+        changes.record(db, "sub_order", "updated", [sub_order_id], [db_sub_order.order_id])
+        await db.commit()
+        await db.refresh(db_sub_order)
+    return db_sub_order
+
+async def get_company_names(db: AsyncSession) -> List[str]:
+    return (await db.execute(company_names_statement())).scalars().all()
+
+async def get_dashboard_stats(db: AsyncSession) -> schemas.DashboardStats:
+    """Count orders and sub-orders per status and ingredient in one round trip."""
+    stats = stats_cache.get("stats")
+    if stats is None:
+        stats = dashboard_stats_from_rows(await db.execute(dashboard_stats_statement()))
+        stats_cache.set("stats", stats)
+    return stats
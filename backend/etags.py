@@ -0,0 +1,66 @@
+import hashlib
+from typing import Iterable, Optional, Sequence
+
+from fastapi import Request, Response
+
+# Strong ETags for order and sub-order reads. A tag is a hash of the ids and
+# modified_date stamps of every row in the representation, so it can be
+# checked against If-None-Match before anything is serialized.
+
+def sub_order_parts(sub_order) -> tuple:
+    return ("s", sub_order.sub_order_id, sub_order.modified_date)
+
+def order_parts(order) -> Iterable[tuple]:
+    yield ("o", order.order_id, order.modified_date)
+    for sub_order in sorted(order.sub_orders, key=lambda s: s.sub_order_id):
+        yield sub_order_parts(sub_order)
+
+def make_etag(parts: Iterable[tuple]) -> str:
+    digest = hashlib.sha1()
+    for part in parts:
+        digest.update(repr(part).encode())
+        digest.update(b"\n")
+    return f'"{digest.hexdigest()}"'
+
+def order_etag(order) -> str:
+    return make_etag(order_parts(order))
+
+def orders_etag(orders: Sequence) -> str:
+    return make_etag(part for order in orders for part in order_parts(order))
+
+def order_rows_etag(order_rows: Sequence, sub_order_rows: Sequence) -> str:
+    """orders_etag for Core rows; sub_order_rows are ordered by order and id."""
+    by_order = {}
+    for row in sub_order_rows:
+        by_order.setdefault(row.order_id, []).append(row)
+
+    def parts():
+        for row in order_rows:
+            yield ("o", row.order_id, row.modified_date)
+            for sub_order in by_order.get(row.order_id, ()):
+                yield sub_order_parts(sub_order)
+    return make_etag(parts())
+
+def sub_order_etag(sub_order) -> str:
+    return make_etag([sub_order_parts(sub_order)])
+
+def sub_orders_etag(sub_orders: Sequence) -> str:
+    return make_etag(sub_order_parts(sub_order) for sub_order in sub_orders)
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Tag the response; return a 304 to send instead if the client's copy is current."""
+    response.headers["ETag"] = etag
+    # Cached copies may be reused, but only after revalidating the tag
+    response.headers["Cache-Control"] = "no-cache"
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=dict(response.headers))
+    return None
@@ -0,0 +1,93 @@
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Optional, Tuple
+from passlib.context import CryptContext
+
+# bcrypt work is CPU bound (~100-250 ms per call at the default cost), so it
+# runs in a small process pool instead of on request threads. The number of
+# hashes queued or running is capped; beyond that callers get
+# HashingPoolSaturated (served as 503) instead of piling up behind a burst.
+
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# 0 hashes on the calling thread, without a pool
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", str(max(HASH_WORKERS, 1) * 8)))
+
+# Hashes made with a different cost are flagged by needs_update, which
+# verify_and_update uses to rehash on login
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+class HashingPoolSaturated(RuntimeError):
+    """Raised when HASH_QUEUE_LIMIT hashing jobs are already in flight."""
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+def _verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return pwd_context.verify_and_update(password, hashed_password)
+
+class HashingPool:
+    """A process pool that rejects work once `queue_limit` jobs are in flight."""
+
+    def __init__(self, workers: int, queue_limit: int):
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self.rejected = 0
+        self._slots = threading.BoundedSemaphore(queue_limit)
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: forking a process that already runs server threads is
+                # unsafe. Workers re-import the __main__ script, so it must be a
+                # launcher (uvicorn, start_backend.py) rather than backend/main.py.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    def submit(self, fn, *args) -> Future:
+        if not self._slots.acquire(blocking=False):
+            self.rejected += 1
+            raise HashingPoolSaturated("Password hashing is saturated, retry shortly")
+        try:
+            if self.workers <= 0:
+                future = Future()
+                try:
+                    future.set_result(fn(*args))
+                except Exception as e:
+                    future.set_exception(e)
+            else:
+                future = self._get_executor().submit(fn, *args)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        return future
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+hashing_pool = HashingPool(HASH_WORKERS, HASH_QUEUE_LIMIT)
+
+def hash_password(password: str) -> str:
+    """Hash a password in the pool, blocking the calling thread until done."""
+    return hashing_pool.submit(_hash, password).result()
+
+def verify_and_update(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password in the pool; also returns a new hash if the cost changed."""
+    return hashing_pool.submit(_verify_and_update, password, hashed_password).result()
+
+async def hash_password_async(password: str) -> str:
+    return await asyncio.wrap_future(hashing_pool.submit(_hash, password))
+
+async def verify_and_update_async(password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    return await asyncio.wrap_future(hashing_pool.submit(_verify_and_update, password, hashed_password))
@@ -1,22 +1,29 @@
+import asyncio
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import APIRouter, FastAPI, Depends, Header, HTTPException, Query, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
-from datetime import timedelta
-import uvicorn
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta
 
-from backend import crud, models, schemas
-from backend.auth import authenticate_user, create_access_token, get_current_active_user, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
-from config.database import SessionLocal, engine, get_db
+from backend import changes, crud, etags, fieldsets, metrics, models, order_export, order_import, pagination, schemas, search, slow_query
+from backend.hashing import HashingPoolSaturated, hashing_pool
+from backend.serialization import FastJSONResponse
+from backend.auth import user_cache, authenticate_user, create_access_token, get_current_active_user, get_password_hash, ACCESS_TOKEN_EXPIRE_MINUTES
+from config.database import DATABASE_MODE, SessionLocal, async_engine, async_pool_telemetry, engine, get_db, pool_telemetry
 
 # Create database tables (only if database is available)
 try:
     models.Base.metadata.create_all(bind=engine)
     print("✅ Database tables created successfully")
+    # The SQLite search index lives in the database file and is kept current
+    # by triggers; PostgreSQL's trigram indexes come from database/migrate.py
+    if engine.dialect.name == "sqlite" and search.install_sqlite(engine):
+        print("✅ Search index built")
 except Exception as e:
     print(f"⚠️  Database not available during startup: {e}")
     print("   Tables will be created when database becomes available")
@@ -30,14 +37,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
+# Request latency and SQL usage per route, served by GET /metrics
+app.add_middleware(metrics.MetricsMiddleware, router_app=app)
+metrics.instrument_engine(engine)
+slow_query.instrument_engine(engine)
+if async_engine is not None:
+    metrics.instrument_engine(async_engine.sync_engine)
+    slow_query.instrument_engine(async_engine.sync_engine)
 
-@app.get("/")
+@app.exception_handler(HashingPoolSaturated)
+async def hashing_saturated_handler(request: Request, exc: HashingPoolSaturated):
+    # Shed login/register bursts instead of queueing them behind bcrypt
+    return JSONResponse(status_code=503, content={"detail": str(exc)}, headers={"Retry-After": "1"})
+
+@app.on_event("shutdown")
+def shutdown_hashing_pool():
+    hashing_pool.shutdown()
+
+@app.on_event("startup")
+async def start_change_feed():
+    # Committed changes reach GET /changes through this loop; with
+    # CHANGE_FEED_TRANSPORT=notify they arrive by NOTIFY from whichever
+    # worker made them
+    changes.hub.bind(asyncio.get_running_loop())
+    changes.start_listener(engine)
+
+@app.on_event("shutdown")
+async def stop_change_feed():
+    changes.stop_listener()
+    changes.hub.close()
+
+# Order/sub-order CRUD and authentication. In async mode (DATABASE_MODE=async)
+# the equivalent coroutine handlers from backend/async_api.py are mounted instead.
+router = APIRouter()
+
+@router.get("/")
 def read_root():
     return {"message": "Order Management API"}
 
 # Authentication endpoints
-@app.post("/register", response_model=schemas.User)
+@router.post("/register", response_model=schemas.User)
 def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     # Check if user already exists
     db_user = db.query(models.User).filter(models.User.username == user.username).first()
@@ -69,7 +110,7 @@ def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
     db.refresh(db_user)
     return db_user
 
-@app.post("/login", response_model=schemas.Token)
+@router.post("/login", response_model=schemas.Token)
 def login_user(user_credentials: schemas.UserLogin, db: Session = Depends(get_db)):
     user = authenticate_user(db, user_credentials.username, user_credentials.password)
     if not user:
@@ -88,82 +129,337 @@ def login_user(user_credentials: schemas.UserLogin, db: Session = Depends(get_db
         "user": user
     }
 
-@app.get("/me", response_model=schemas.User)
-def read_users_me(current_user: models.User = Depends(get_current_active_user)):
+@router.get("/me", response_model=schemas.User)
+def read_users_me(current_user: schemas.User = Depends(get_current_active_user)):
     return current_user
 
-@app.post("/orders/", response_model=schemas.Order)
+@router.post("/orders/", response_model=schemas.Order)
 def create_order(
     order: schemas.OrderCreate, 
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: schemas.User = Depends(get_current_active_user)
 ):
     db_order = crud.create_order(db=db, order=order, user_id=current_user.user_id)
     return schemas.Order.model_validate(db_order)
 
-@app.get("/orders/", response_model=List[schemas.Order])
-def read_orders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    orders = crud.get_orders(db, skip=skip, limit=limit)
-    return [schemas.Order.model_validate(order) for order in orders]
+IMPORT_CONTENT_TYPES = {
+    "text/csv": schemas.FileFormatEnum.CSV,
+    "application/x-ndjson": schemas.FileFormatEnum.NDJSON,
+    "application/ndjson": schemas.FileFormatEnum.NDJSON,
+    "application/jsonl": schemas.FileFormatEnum.NDJSON,
+}
+
+@app.post("/orders/import", response_model=schemas.OrderImportResult)
+async def import_orders(
+    request: Request,
+    format: Optional[schemas.FileFormatEnum] = None,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """Bulk-create orders from a streamed CSV or NDJSON body.
+
+    The format comes from the `format` query parameter or the Content-Type
+    header. Each row is validated as an OrderCreate; valid rows are inserted
+    in batches and invalid rows are reported by row number.
+    """
+    if format is None:
+        content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+        format = IMPORT_CONTENT_TYPES.get(content_type)
+    if format is None:
+        raise HTTPException(
+            status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+            detail="Send text/csv or application/x-ndjson, or pass ?format=csv|ndjson"
+        )
+    return await order_import.import_orders(request.stream(), format, db, user_id=current_user.user_id)
+
+@app.get("/orders/export", response_class=StreamingResponse)
+def export_orders(
+    format: schemas.FileFormatEnum = schemas.FileFormatEnum.NDJSON,
+    status: Optional[schemas.StatusEnum] = None,
+    company_name: Optional[str] = None,
+    order_date_from: Optional[datetime] = None,
+    order_date_to: Optional[datetime] = None,
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """Stream every matching order with its sub-orders as NDJSON or CSV.
+
+    Rows come from a server-side cursor and are written as they are read,
+    so memory use does not grow with the size of the order book. NDJSON has
+    one order per line with nested sub_orders; CSV has one row per sub-order.
+    """
+    filename = f"orders-{datetime.utcnow():%Y%m%d%H%M%S}.{format.value}"
+    return StreamingResponse(
+        order_export.export_orders(
+            engine, format,
+            status=status, company_name=company_name,
+            order_date_from=order_date_from, order_date_to=order_date_to
+        ),
+        media_type=order_export.EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@app.get("/changes", response_class=StreamingResponse)
+async def stream_changes(
+    last_event_id: Optional[str] = Header(None),
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    """Server-sent events for every committed order and sub-order change.
+
+    Events are named "<entity>.<action>" (order.created, sub_order.updated,
+    ...) with the affected ids as data. A client reconnecting with
+    Last-Event-ID is sent what it missed, or a "reset" event when that is no
+    longer known and it has to refetch.
+    """
+    # The stream can stay open for hours; the session the authentication
+    # used must not keep a pooled connection for that long
+    db.close()
+    return StreamingResponse(
+        changes.event_stream(changes.hub, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/health/pool", response_model=schemas.DatabasePoolStats)
+def read_pool_stats():
+    # Connection pool occupancy and checkout wait times, for sizing DB_POOL_SIZE
+    return {
+        "sync_engine": pool_telemetry.snapshot(engine.pool),
+        "async_engine": async_pool_telemetry.snapshot(async_engine.sync_engine.pool) if async_engine else None,
+    }
+
+@app.get("/metrics", response_class=Response)
+def read_metrics():
+    # Prometheus text format; scrape this rather than polling /health/*
+    return Response(metrics.render_latest(), headers={"Content-Type": metrics.CONTENT_TYPE_LATEST})
+
+@app.get("/health/cache", response_model=Dict[str, schemas.CacheStats])
+def read_cache_stats():
+    # Hit/miss counters of the in-process caches
+    return {"users": user_cache.stats(), "stats": crud.stats_cache.stats()}
+
+@router.get("/orders/", response_model=List[schemas.Order])
+def read_orders(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort_by: schemas.OrderSortEnum = schemas.OrderSortEnum.ORDER_ID,
+    descending: bool = False,
+    status: Optional[schemas.StatusEnum] = None,
+    company_name: Optional[str] = None,
+    order_date_from: Optional[datetime] = None,
+    order_date_to: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    try:
+        # e.g. fields=order_id,status for an id picker; include=sub_orders nests them
+        order_fields, included = fieldsets.parse_fieldset(
+            fields, include, crud.ORDER_FIELDS, "order_id", relations=("sub_orders",)
+        )
+        order_rows, sub_order_rows = crud.get_order_rows(
+            db, fields=order_fields, include_sub_orders="sub_orders" in included,
+            skip=skip, limit=limit,
+            cursor=cursor, sort_by=sort_by, descending=descending,
+            status=status, company_name=company_name,
+            order_date_from=order_date_from, order_date_to=order_date_to
+        )
+    except (pagination.InvalidCursor, fieldsets.InvalidFieldset) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    pagination.set_next_cursor(response, order_rows, crud.ORDER_SORT_KEYS[sort_by], sort_by, limit, descending)
+    # Unchanged pages are answered with 304 before any serialization. Pages
+    # are built from plain rows and returned as a response, so FastAPI does
+    # not validate them against response_model (which still documents them).
+    return etags.not_modified(request, response, etags.order_rows_etag(order_rows, sub_order_rows)) or FastJSONResponse(
+        crud.order_dicts(order_rows, sub_order_rows, order_fields, "sub_orders" in included), headers=dict(response.headers)
+    )
+
+def _read_order_batch(db, ids, fields: Optional[str], include: Optional[str], request: Request, response: Response):
+    order_ids = crud.order_batch_ids(ids)
+    order_fields, included = fieldsets.parse_fieldset(
+        fields, include, crud.ORDER_FIELDS, "order_id", relations=("sub_orders",)
+    )
+    order_rows, sub_order_rows = crud.get_order_rows_by_id(
+        db, order_ids, fields=order_fields, include_sub_orders="sub_orders" in included
+    )
+    found, batch = crud.order_batch(order_ids, order_rows, sub_order_rows, order_fields, "sub_orders" in included)
+    return etags.not_modified(request, response, etags.order_rows_etag(found, sub_order_rows)) or FastJSONResponse(
+        batch, headers=dict(response.headers)
+    )
+
+# Declared before /orders/{order_id}, which would otherwise match "batch"
+@router.get("/orders/batch", response_model=schemas.OrderBatch)
+def read_order_batch(
+    request: Request,
+    response: Response,
+    ids: str,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Orders for a comma-separated id list, in request order; unknown ids are listed in `missing`."""
+    try:
+        return _read_order_batch(db, crud.parse_order_ids(ids), fields, include, request, response)
+    except (crud.InvalidOrderBatch, fieldsets.InvalidFieldset) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/orders/batch", response_model=schemas.OrderBatch)
+def read_order_batch_from_body(
+    batch: schemas.OrderBatchRequest,
+    request: Request,
+    response: Response,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """GET /orders/batch for id lists too long for a URL."""
+    try:
+        return _read_order_batch(db, batch.ids, fields, include, request, response)
+    except (crud.InvalidOrderBatch, fieldsets.InvalidFieldset) as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-@app.get("/orders/{order_id}", response_model=schemas.Order)
-def read_order(order_id: int, db: Session = Depends(get_db)):
-    db_order = crud.get_order(db, order_id=order_id)
+@router.get("/orders/companies", response_model=List[str])
+def read_company_names(db: Session = Depends(get_db)):
+    """Distinct company names across all orders, for the company filter."""
+    return crud.get_company_names(db)
+
+@router.get("/orders/{order_id}", response_model=schemas.Order)
+def read_order(order_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    db_order = crud.get_order(db, order_id=order_id, loader="joined")
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
-    return schemas.Order.model_validate(db_order)
+    return etags.not_modified(request, response, etags.order_etag(db_order)) or schemas.Order.model_validate(db_order)
 
-@app.put("/orders/{order_id}", response_model=schemas.Order)
+@router.put("/orders/{order_id}", response_model=schemas.Order)
 def update_order(
     order_id: int, 
     order: schemas.OrderUpdate, 
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: schemas.User = Depends(get_current_active_user)
 ):
     db_order = crud.update_order(db, order_id=order_id, order_update=order, user_id=current_user.user_id)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     return schemas.Order.model_validate(db_order)
 
-@app.delete("/orders/{order_id}")
+@router.delete("/orders/{order_id}")
 def delete_order(
     order_id: int, 
     db: Session = Depends(get_db),
-    current_user: models.User = Depends(get_current_active_user)
+    current_user: schemas.User = Depends(get_current_active_user)
 ):
     db_order = crud.delete_order(db, order_id=order_id)
     if db_order is None:
         raise HTTPException(status_code=404, detail="Order not found")
     return {"message": "Order deleted successfully"}
 
-@app.get("/orders/{order_id}/sub-orders/", response_model=List[schemas.SubOrder])
-def read_sub_orders(order_id: int, db: Session = Depends(get_db)):
-    return crud.get_sub_orders(db, order_id=order_id)
+@router.get("/stats", response_model=schemas.DashboardStats)
+def read_stats(db: Session = Depends(get_db)):
+    return crud.get_dashboard_stats(db)
 
-@app.get("/sub-orders/", response_model=List[schemas.SubOrder])
-def read_all_sub_orders(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_all_sub_orders(db, skip=skip, limit=limit)
+@router.get("/search", response_model=List[schemas.OrderSearchResult])
+def search_orders(
+    q: str,
+    skip: int = Query(0, ge=0, le=search.MAX_SKIP),
+    limit: int = Query(20, ge=1, le=search.MAX_LIMIT),
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """Orders whose company, product, molecule or sub-order vendor matches `q`, best match first."""
+    try:
+        order_fields, included = fieldsets.parse_fieldset(
+            fields, include, crud.ORDER_FIELDS, "order_id", relations=("sub_orders",)
+        )
+        order_rows, sub_order_rows = crud.search_order_rows(
+            db, q, fields=order_fields, include_sub_orders="sub_orders" in included, skip=skip, limit=limit
+        )
+    except (search.InvalidSearch, fieldsets.InvalidFieldset) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return FastJSONResponse(crud.search_results(order_rows, sub_order_rows, order_fields, "sub_orders" in included))
+
+@router.get("/orders/{order_id}/sub-orders/", response_model=List[schemas.SubOrder])
+def read_sub_orders(order_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    sub_order_rows = crud.get_sub_order_rows_for_order(db, order_id=order_id)
+    return etags.not_modified(request, response, etags.sub_orders_etag(sub_order_rows)) or FastJSONResponse(
+        [crud.sub_order_dict(row) for row in sub_order_rows], headers=dict(response.headers)
+    )
 
-@app.put("/sub-orders/{sub_order_id}/status")
+@router.get("/sub-orders/", response_model=List[schemas.SubOrder])
+def read_all_sub_orders(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    sort_by: schemas.SubOrderSortEnum = schemas.SubOrderSortEnum.SUB_ORDER_ID,
+    descending: bool = False,
+    order_id: Optional[int] = None,
+    status: Optional[schemas.StatusEnum] = None,
+    ingredient_type: Optional[str] = None,
+    sub_order_date_from: Optional[datetime] = None,
+    sub_order_date_to: Optional[datetime] = None,
+    fields: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    try:
+        sub_order_fields, _ = fieldsets.parse_fieldset(fields, None, crud.SUB_ORDER_FIELDS, "sub_order_id")
+        sub_order_rows = crud.get_sub_order_rows(
+            db, fields=sub_order_fields, skip=skip, limit=limit,
+            cursor=cursor, sort_by=sort_by, descending=descending,
+            order_id=order_id, status=status, ingredient_type=ingredient_type,
+            sub_order_date_from=sub_order_date_from, sub_order_date_to=sub_order_date_to
+        )
+    except (pagination.InvalidCursor, fieldsets.InvalidFieldset) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    pagination.set_next_cursor(response, sub_order_rows, crud.SUB_ORDER_SORT_KEYS[sort_by], sort_by, limit, descending)
+    return etags.not_modified(request, response, etags.sub_orders_etag(sub_order_rows)) or FastJSONResponse(
+        [crud.sub_order_dict(row, sub_order_fields) for row in sub_order_rows], headers=dict(response.headers)
+    )
+
+@router.post("/sub-orders/bulk-update", response_model=schemas.SubOrderBulkUpdateResult)
+def bulk_update_sub_orders(
+    bulk: schemas.SubOrderBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user: schemas.User = Depends(get_current_active_user)
+):
+    # One UPDATE ... RETURNING for all targeted sub-orders, e.g. closing a batch
+    try:
+        return crud.bulk_update_sub_orders(db, bulk)
+    except crud.InvalidBulkUpdate as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.put("/sub-orders/{sub_order_id}/status")
 def update_sub_order_status(sub_order_id: int, status: schemas.StatusEnum, db: Session = Depends(get_db)):
     db_sub_order = crud.update_sub_order_status(db, sub_order_id=sub_order_id, status=status)
     if db_sub_order is None:
         raise HTTPException(status_code=404, detail="Sub-order not found")
     return {"message": "Sub-order status updated successfully"}
 
-@app.put("/sub-orders/{sub_order_id}", response_model=schemas.SubOrder)
+@router.put("/sub-orders/{sub_order_id}", response_model=schemas.SubOrder)
 def update_sub_order(sub_order_id: int, sub_order: schemas.SubOrderUpdate, db: Session = Depends(get_db)):
     db_sub_order = crud.update_sub_order(db, sub_order_id=sub_order_id, sub_order_update=sub_order)
     if db_sub_order is None:
         raise HTTPException(status_code=404, detail="Sub-order not found")
     return db_sub_order
 
-@app.get("/sub-orders/{sub_order_id}", response_model=schemas.SubOrder)
-def read_sub_order(sub_order_id: int, db: Session = Depends(get_db)):
+@router.get("/sub-orders/{sub_order_id}", response_model=schemas.SubOrder)
+def read_sub_order(sub_order_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
     db_sub_order = crud.get_sub_order(db, sub_order_id=sub_order_id)
     if db_sub_order is None:
         raise HTTPException(status_code=404, detail="Sub-order not found")
-    return db_sub_order
+    return etags.not_modified(request, response, etags.sub_order_etag(db_sub_order)) or db_sub_order
+
+if DATABASE_MODE == "async":
+    from backend.async_api import router as crud_router
+else:
+    crud_router = router
+app.include_router(crud_router)
 
-if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+# No `python backend/main.py` entry point: the hashing pool's spawned workers
+# re-import the script that started the server, which here would create the
+# tables, install the search index and instrument the app again in every
+# worker. Start the server with uvicorn or start_backend.py.
\ No newline at end of file
@@ -0,0 +1,152 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, REGISTRY, generate_latest
+from sqlalchemy import event
+from starlette.routing import Match
+
+# Prometheus metrics for GET /metrics: request latency and in-flight requests
+# per route, plus the SQL statements each request ran and the time it spent
+# in the database. Routes are labelled by their path template
+# (/orders/{order_id}) so the number of series stays bounded.
+#
+# With several uvicorn workers set PROMETHEUS_MULTIPROC_DIR to an empty
+# directory shared by the workers so /metrics reports all of them.
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "Time to send the full response",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "Requests being handled",
+    ["method", "route"], multiprocess_mode="livesum",
+)
+REQUEST_DB_STATEMENTS = Histogram(
+    "http_request_db_statements", "SQL statements executed per request",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds", "Time per request spent executing SQL",
+    ["method", "route"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DB_STATEMENT_DURATION = Histogram(
+    "db_statement_duration_seconds", "Execution time of single SQL statements",
+    ["operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+DB_STATEMENT_ERRORS = Counter("db_statement_errors_total", "SQL statements that raised", ["operation"])
+
+OPERATIONS = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+UNMATCHED_ROUTE = "unmatched"
+
+class RequestDatabaseStats:
+    """Route, statements and database time of the current request."""
+
+    __slots__ = ("method", "route", "statements", "seconds")
+
+    def __init__(self, method: str, route: str):
+        self.method = method
+        self.route = route
+        self.statements = 0
+        self.seconds = 0.0
+
+# Handlers run in a copy of the middleware's context (thread pool or
+# greenlet), so they update the same object
+_request_stats: ContextVar[Optional[RequestDatabaseStats]] = ContextVar("request_db_stats", default=None)
+
+def current_request() -> Optional[RequestDatabaseStats]:
+    """Stats of the request being handled, or None outside a request."""
+    return _request_stats.get()
+
+def statement_operation(statement: str) -> str:
+    words = statement.lstrip().split(None, 1)
+    operation = words[0].upper() if words else ""
+    return operation if operation in OPERATIONS else "OTHER"
+
+def instrument_engine(engine):
+    """Time every statement on a (sync) engine and charge it to the current request."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+        DB_STATEMENT_DURATION.labels(statement_operation(statement)).observe(elapsed)
+        stats = _request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        # after_cursor_execute does not run for failed statements
+        starts = context.connection.info.get("metrics_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
+        DB_STATEMENT_ERRORS.labels(statement_operation(context.statement or "")).inc()
+
+def route_name(app, scope) -> str:
+    """The path template of the route that will handle `scope`."""
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, concurrency and SQL usage per route."""
+
+    def __init__(self, app, router_app=None):
+        self.app = app
+        # The FastAPI application whose routes name the requests
+        self.router_app = router_app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_name(self.router_app, scope)
+        status_code = 500
+        stats = RequestDatabaseStats(method, route)
+        token = _request_stats.set(stats)
+        in_progress = REQUESTS_IN_PROGRESS.labels(method, route)
+        in_progress.inc()
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # Streaming responses are timed until their last chunk is sent
+            REQUEST_DURATION.labels(method, route, str(status_code)).observe(time.perf_counter() - start)
+            REQUEST_DB_STATEMENTS.labels(method, route).observe(stats.statements)
+            REQUEST_DB_SECONDS.labels(method, route).observe(stats.seconds)
+            in_progress.dec()
+            _request_stats.reset(token)
+
+def metrics_registry():
+    """The registry to expose: all workers' metrics in multiprocess mode."""
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return registry
+    return REGISTRY
+
+def render_latest() -> bytes:
+    return generate_latest(metrics_registry())
@@ -2,7 +2,7 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Text, Boolean, Index
 from sqlalchemy.orm import relationship
 from config.database import Base
 from datetime import datetime
@@ -56,6 +56,18 @@ class Order(Base):
     sub_orders = relationship("SubOrder", back_populates="order")
     creator = relationship("User", foreign_keys=[created_by], back_populates="created_orders")
     modifier = relationship("User", foreign_keys=[modified_by], back_populates="modified_orders")
+    
+    # Indexes backing the list endpoint filters; each ends with the keyset
+    # pagination tie-breaker so a filtered, sorted page is a single range scan.
+    # The (filter, order_id) pairs serve the default sort by order_id, the
+    # (filter, order_date, order_id) ones a date range or sort on top.
+    __table_args__ = (
+        Index("ix_orders_status_order_id", "status", "order_id"),
+        Index("ix_orders_status_order_date", "status", "order_date", "order_id"),
+        Index("ix_orders_company_name_order_id", "company_name", "order_id"),
+        Index("ix_orders_company_name_order_date", "company_name", "order_date", "order_id"),
+        Index("ix_orders_order_date", "order_date", "order_id"),
+    )
 
 class SubOrder(Base):
     __tablename__ = "sub_orders"
@@ -77,7 +89,16 @@ class SubOrder(Base):
     approved_date = Column(DateTime, nullable=True)
     remarks = Column(Text, nullable=True)
     created_by = Column(Integer, ForeignKey("users.user_id"), nullable=True)
+    modified_date = Column(DateTime, nullable=True, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     # Relationships
     order = relationship("Order", back_populates="sub_orders")
-    creator = relationship("User", back_populates="created_sub_orders")
\ No newline at end of file
+    creator = relationship("User", back_populates="created_sub_orders")
+    
+    # Indexes backing sub-order lookups by order and the list endpoint filters
+    __table_args__ = (
+        Index("ix_sub_orders_order_id_ingredient_type", "order_id", "ingredient_type"),
+        Index("ix_sub_orders_status_ingredient_type", "status", "ingredient_type", "sub_order_id"),
+        Index("ix_sub_orders_ingredient_type_status", "ingredient_type", "status", "sub_order_id"),
+        Index("ix_sub_orders_sub_order_date", "sub_order_date", "sub_order_id"),
+    )
@@ -0,0 +1,118 @@
+import csv
+import io
+import json
+import os
+from datetime import datetime
+from typing import Iterator, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.engine import Engine
+
+from backend import crud, models, schemas
+
+# Rows fetched from the server-side cursor per round trip
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Bytes buffered before a chunk is handed to the response
+EXPORT_CHUNK_BYTES = int(os.getenv("EXPORT_CHUNK_BYTES", str(64 * 1024)))
+
+ORDER_COLUMNS = [column.name for column in models.Order.__table__.columns]
+SUB_ORDER_COLUMNS = [column.name for column in models.SubOrder.__table__.columns]
+
+# CSV has one row per sub-order (or one per order without sub-orders), so
+# sub-order columns are prefixed to keep them apart from the order's own
+CSV_SUB_ORDER_COLUMNS = [name for name in SUB_ORDER_COLUMNS if name != "order_id"]
+CSV_HEADER = ORDER_COLUMNS + [
+    name if name.startswith("sub_order_") else f"sub_order_{name}" for name in CSV_SUB_ORDER_COLUMNS
+]
+
+EXPORT_MEDIA_TYPES = {
+    schemas.FileFormatEnum.CSV: "text/csv",
+    schemas.FileFormatEnum.NDJSON: "application/x-ndjson",
+}
+
+def export_statement(**filters):
+    """Orders left-joined to their sub-orders, grouped by order."""
+    order_table = models.Order.__table__
+    sub_order_table = models.SubOrder.__table__
+    statement = (
+        select(
+            *order_table.columns,
+            *[column.label(f"sub_order__{column.name}") for column in sub_order_table.columns],
+        )
+        .select_from(order_table.outerjoin(sub_order_table))
+        .order_by(order_table.c.order_id, sub_order_table.c.sub_order_id)
+    )
+    return crud.filter_orders(statement, **filters)
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def iter_export_rows(engine: Engine, batch_size: int = EXPORT_BATCH_SIZE, **filters) -> Iterator[dict]:
+    """Yield joined order/sub-order rows from a server-side cursor."""
+    with engine.connect() as conn:
+        result = conn.execution_options(stream_results=True, yield_per=batch_size).execute(
+            export_statement(**filters)
+        )
+        for row in result.mappings():
+            yield row
+
+def iter_ndjson(rows: Iterator[dict]) -> Iterator[str]:
+    """One JSON line per order, with its sub-orders nested like GET /orders/."""
+    order: Optional[dict] = None
+    for row in rows:
+        if order is None or order["order_id"] != row["order_id"]:
+            if order is not None:
+                yield json.dumps(order, default=_json_default) + "\n"
+            order = {name: row[name] for name in ORDER_COLUMNS}
+            order["sub_orders"] = []
+        if row["sub_order__sub_order_id"] is not None:
+            order["sub_orders"].append({name: row[f"sub_order__{name}"] for name in SUB_ORDER_COLUMNS})
+    if order is not None:
+        yield json.dumps(order, default=_json_default) + "\n"
+
+def iter_csv(rows: Iterator[dict]) -> Iterator[str]:
+    """A header line, then one line per order/sub-order pair."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush() -> str:
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writerow(CSV_HEADER)
+    yield flush()
+    for row in rows:
+        values: List = [row[name] for name in ORDER_COLUMNS]
+        values += [row[f"sub_order__{name}"] for name in CSV_SUB_ORDER_COLUMNS]
+        writer.writerow(value.isoformat() if isinstance(value, datetime) else value for value in values)
+        yield flush()
+
+def chunked(lines: Iterator[str], chunk_bytes: int = EXPORT_CHUNK_BYTES) -> Iterator[bytes]:
+    """Group lines into response chunks; the first line is sent on its own so
+    the client sees bytes before the rest of the export is read."""
+    parts: List[bytes] = []
+    size = 0
+    first = True
+    for line in lines:
+        data = line.encode("utf-8")
+        if first:
+            yield data
+            first = False
+            continue
+        parts.append(data)
+        size += len(data)
+        if size >= chunk_bytes:
+            yield b"".join(parts)
+            parts, size = [], 0
+    if parts:
+        yield b"".join(parts)
+
+def export_orders(engine: Engine, export_format: schemas.FileFormatEnum, **filters) -> Iterator[bytes]:
+    """Stream every matching order with its sub-orders as CSV or NDJSON bytes."""
+    rows = iter_export_rows(engine, **filters)
+    lines = iter_csv(rows) if export_format == schemas.FileFormatEnum.CSV else iter_ndjson(rows)
+    return chunked(lines)
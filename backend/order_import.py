@@ -0,0 +1,169 @@
+import codecs
+import csv
+import json
+import os
+from typing import AsyncIterator, List, Optional, Tuple, Union
+
+from pydantic import ValidationError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from backend import crud, schemas
+
+# Orders validated and inserted per transaction
+IMPORT_BATCH_SIZE = int(os.getenv("IMPORT_BATCH_SIZE", "1000"))
+# Rows whose errors are reported; `failed` still counts every failed row, so
+# a file of garbage cannot grow the response without bound
+IMPORT_MAX_ERRORS = int(os.getenv("IMPORT_MAX_ERRORS", "1000"))
+
+def _decode(line: bytes):
+    try:
+        return line.decode("utf-8").rstrip("\r")
+    except UnicodeDecodeError as e:
+        return ValueError(f"invalid UTF-8 at byte {e.start}: {e.reason}")
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[Union[str, ValueError]]:
+    """Split a byte stream into decoded text lines without buffering the whole body.
+
+    A line that is not valid UTF-8 is yielded as a ValueError so the parsers
+    can report it against its row and carry on.
+    """
+    buffer = b""
+    first = True
+    async for chunk in chunks:
+        if first and chunk:
+            if chunk.startswith(codecs.BOM_UTF8):
+                chunk = chunk[len(codecs.BOM_UTF8):]
+            first = False
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield _decode(line)
+    if buffer:
+        yield _decode(buffer)
+
+async def iter_ndjson_records(lines: AsyncIterator[Union[str, ValueError]]) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (row, record) pairs, where record is a dict or the parse error."""
+    row = 0
+    async for line in lines:
+        if isinstance(line, ValueError):
+            row += 1
+            yield row, line
+            continue
+        if not line.strip():
+            continue
+        row += 1
+        try:
+            record = json.loads(line)
+            if not isinstance(record, dict):
+                raise ValueError("expected a JSON object")
+        except ValueError as e:
+            record = e
+        yield row, record
+
+async def iter_csv_records(lines: AsyncIterator[Union[str, ValueError]]) -> AsyncIterator[Tuple[int, object]]:
+    """Yield (row, record) pairs from CSV text whose first record is the header.
+
+    A record continues onto the next line while it has an unbalanced number
+    of quote characters, which is how RFC 4180 encodes embedded newlines.
+    Empty cells are dropped so the schema defaults apply. An undecodable line
+    fails the record it belongs to; without a readable header no row can be
+    read, so the rest of the body is reported as one error.
+    """
+    header = None
+    pending = None
+    row = 0
+    async for line in lines:
+        if isinstance(line, ValueError):
+            if header is None:
+                yield row + 1, ValueError(f"header: {line}")
+                return
+            # Drop whatever part of the record was read before it
+            pending = None
+            row += 1
+            yield row, line
+            continue
+        pending = line if pending is None else f"{pending}\n{line}"
+        if pending.count('"') % 2:
+            continue
+        text, pending = pending, None
+        if not text.strip():
+            continue
+        values = next(csv.reader([text]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        row += 1
+        if len(values) != len(header):
+            yield row, ValueError(f"expected {len(header)} columns, got {len(values)}")
+            continue
+        yield row, {name: value for name, value in zip(header, values) if value != ""}
+    if pending is not None:
+        yield row + 1, ValueError("unterminated quoted field")
+
+def _format_errors(error: Exception) -> List[str]:
+    if isinstance(error, ValidationError):
+        return [
+            f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" if e['loc'] else e['msg']
+            for e in error.errors()
+        ]
+    return [str(error)]
+
+async def import_orders(
+    chunks: AsyncIterator[bytes],
+    import_format: schemas.FileFormatEnum,
+    db: Session,
+    user_id: Optional[int] = None,
+    batch_size: int = IMPORT_BATCH_SIZE
+) -> schemas.OrderImportResult:
+    """Validate streamed CSV/NDJSON orders and insert them in batches.
+
+    Invalid rows are reported (the first IMPORT_MAX_ERRORS of them) and
+    skipped; valid rows are inserted batch by batch with
+    crud.bulk_create_orders, so memory use is bounded by the batch size rather
+    than the upload size. A batch the database rejects is rolled back and its
+    rows reported as failed.
+    """
+    lines = iter_lines(chunks)
+    if import_format == schemas.FileFormatEnum.CSV:
+        records = iter_csv_records(lines)
+    else:
+        records = iter_ndjson_records(lines)
+
+    result = schemas.OrderImportResult(imported=0, failed=0, errors=[])
+    batch_rows: List[int] = []
+    batch: List[schemas.OrderCreate] = []
+
+    def record_failure(row: int, messages: List[str]):
+        result.failed += 1
+        if len(result.errors) < IMPORT_MAX_ERRORS:
+            result.errors.append(schemas.OrderImportError(row=row, errors=messages))
+
+    async def flush():
+        try:
+            await run_in_threadpool(crud.bulk_create_orders, db, batch, user_id)
+            result.imported += len(batch)
+        except SQLAlchemyError as e:
+            await run_in_threadpool(db.rollback)
+            message = f"Database error: {e.__class__.__name__}"
+            for row in batch_rows:
+                record_failure(row, [message])
+        batch.clear()
+        batch_rows.clear()
+
+    async for row, record in records:
+        if isinstance(record, Exception):
+            record_failure(row, _format_errors(record))
+            continue
+        try:
+            batch.append(schemas.OrderCreate(**record))
+            batch_rows.append(row)
+        except ValidationError as e:
+            record_failure(row, _format_errors(e))
+            continue
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+    return result
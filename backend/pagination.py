@@ -0,0 +1,91 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Sequence
+
+from sqlalchemy import DateTime, tuple_
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded or does not match the query."""
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _decode_value(column, value):
+    # The values end up as bind parameters, so a crafted cursor must not be
+    # able to compare a column against a value of another type
+    if value is None:
+        if not column.expression.nullable:
+            raise InvalidCursor(f"Cursor value for {column.key} cannot be null")
+        return value
+    if isinstance(column.type, DateTime):
+        if not isinstance(value, str):
+            raise InvalidCursor(f"Cursor value for {column.key} must be a timestamp")
+        return datetime.fromisoformat(value)
+    python_type = column.type.python_type
+    # JSON booleans would otherwise pass as integers
+    if isinstance(value, bool) or not isinstance(value, python_type):
+        raise InvalidCursor(f"Cursor value for {column.key} must be {python_type.__name__}")
+    return value
+
+def encode_cursor(sort_by: str, descending: bool, values: Sequence) -> str:
+    """Encode the sort key of the last row on a page as an opaque cursor."""
+    payload = {"s": sort_by, "d": descending, "v": [_encode_value(v) for v in values]}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort_by: str, descending: bool, columns: Sequence) -> list:
+    """Decode a cursor produced by encode_cursor for the same sort order."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        values = payload["v"]
+        if payload["s"] != sort_by or payload["d"] != descending or len(values) != len(columns):
+            raise InvalidCursor("Cursor does not match the requested sort order")
+        return [_decode_value(column, value) for column, value in zip(columns, values)]
+    except InvalidCursor:
+        raise
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Malformed cursor") from e
+
+def paginate(query, columns: Sequence, sort_by: str, skip: int = 0, limit: int = 100,
+             cursor: Optional[str] = None, descending: bool = False):
+    """Order a query by `columns` and apply either keyset or offset pagination.
+
+    `columns` must end with the primary key so the sort order is total. When a
+    cursor is given, `skip` is ignored and rows strictly after the cursor are
+    returned, which lets the database seek straight to the page instead of
+    scanning and discarding `skip` rows.
+    """
+    if cursor is not None:
+        values = decode_cursor(cursor, sort_by, descending, columns)
+        if len(columns) == 1:
+            key, after = columns[0], values[0]
+        else:
+            key, after = tuple_(*columns), tuple_(*values)
+        query = query.filter(key < after if descending else key > after)
+    elif skip:
+        query = query.offset(skip)
+    query = query.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    return query.limit(limit)
+
+def next_cursor(items: Sequence, columns: Sequence, sort_by: str, limit: int,
+                descending: bool = False) -> Optional[str]:
+    """Return the cursor for the page after `items`, or None on the last page."""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor(sort_by, descending, [getattr(last, c.key) for c in columns])
+
+def set_next_cursor(response, items: Sequence, columns: Sequence, sort_by, limit: int, descending: bool = False):
+    """Expose the cursor for the following page in the X-Next-Cursor header.
+
+    The header is also sent for skip/limit requests, so clients can switch to
+    cursor paging from any page.
+    """
+    cursor = next_cursor(items, columns, sort_by.value, limit, descending)
+    if cursor:
+        response.headers["X-Next-Cursor"] = cursor
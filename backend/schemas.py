@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 from enum import Enum
 
@@ -13,6 +13,22 @@ class IngredientEnum(str, Enum):
     N = "N"
     NA = "N/A"
 
+class FileFormatEnum(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class OrderSortEnum(str, Enum):
+    ORDER_ID = "order_id"
+    ORDER_DATE = "order_date"
+    COMPANY_NAME = "company_name"
+    STATUS = "status"
+
+class SubOrderSortEnum(str, Enum):
+    SUB_ORDER_ID = "sub_order_id"
+    ORDER_ID = "order_id"
+    INGREDIENT_TYPE = "ingredient_type"
+    STATUS = "status"
+
 class OrderBase(BaseModel):
     company_name: str
     product_name: str
@@ -80,6 +96,17 @@ class SubOrderUpdate(BaseModel):
     approved_date: Optional[datetime] = None
     remarks: Optional[str] = None
 
+class SubOrderBulkFilter(BaseModel):
+    order_id: Optional[int] = None
+    status: Optional[StatusEnum] = None
+    ingredient_type: Optional[str] = None
+
+class SubOrderBulkUpdate(BaseModel):
+    # Either explicit ids or a filter selects the sub-orders to change
+    sub_order_ids: Optional[List[int]] = None
+    filter: Optional[SubOrderBulkFilter] = None
+    changes: SubOrderUpdate
+
 class SubOrder(SubOrderBase):
     sub_order_id: int
     order_id: int
@@ -94,6 +121,71 @@ class Order(OrderBase):
     class Config:
         from_attributes = True
 
+class SubOrderBulkUpdateItem(BaseModel):
+    sub_order_id: int
+    updated: bool
+    sub_order: Optional[SubOrder] = None
+
+class SubOrderBulkUpdateResult(BaseModel):
+    updated: int
+    not_found: int
+    results: List[SubOrderBulkUpdateItem]
+
+class OrderSearchResult(Order):
+    score: float
+
+class OrderBatchRequest(BaseModel):
+    ids: List[int]
+
+class OrderBatch(BaseModel):
+    orders: List[Order]
+    missing: List[int]
+
+class OrderImportError(BaseModel):
+    row: int
+    errors: List[str]
+
+class OrderImportResult(BaseModel):
+    imported: int
+    failed: int
+    errors: List[OrderImportError]
+
+class DashboardStats(BaseModel):
+    total_orders: int
+    total_sub_orders: int
+    orders_by_status: Dict[str, int]
+    sub_orders_by_status: Dict[str, int]
+    sub_orders_by_ingredient: Dict[str, int]
+
+class PoolStats(BaseModel):
+    pool_class: str
+    checkouts: int
+    checkout_timeouts: int
+    connections_opened: int
+    connections_invalidated: int
+    wait_ms_total: float
+    wait_ms_max: float
+    wait_ms_avg: float
+    # Only reported by queue pools; NullPool keeps no connections
+    size: Optional[int] = None
+    checked_out: Optional[int] = None
+    checked_in: Optional[int] = None
+    overflow: Optional[int] = None
+    max_overflow: Optional[int] = None
+    timeout_seconds: Optional[float] = None
+
+class CacheStats(BaseModel):
+    size: int
+    maxsize: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+
+class DatabasePoolStats(BaseModel):
+    sync_engine: PoolStats
+    # Present when DATABASE_MODE=async
+    async_engine: Optional[PoolStats] = None
+
 # User schemas for authentication
 class UserBase(BaseModel):
     username: str
@@ -0,0 +1,266 @@
+from typing import List
+
+from sqlalchemy import Float, case, cast, column, func, inspect, literal, literal_column, or_, select, table, text, type_coerce, union
+
+from backend import models
+
+# Search over order company, product and molecule names and sub-order vendor
+# companies, for users typing fragments of a name.
+#
+# Both backends split the query into terms (see search_terms); an order
+# matches when every term appears in at least one of its four columns.
+#
+# PostgreSQL: pg_trgm GiST indexes on the four columns serve substring
+# (ILIKE '%term%') and typo-tolerant (word similarity) matches and return
+# them nearest first, so each term and column only yields its nearest
+# skip + limit matching orders however common the term is; those few
+# candidates are then ranked by their best word similarity. The extensions
+# and indexes are created by database/migrate.py.
+#
+# SQLite: an FTS5 table with the trigram tokenizer (SQLite 3.34+) holds one
+# row per order, keyed by order_id, with its sub-orders' vendor companies
+# concatenated. Triggers keep it in sync with every write to orders and
+# sub_orders, so imports and bulk updates need no extra code. Matches are
+# substrings ranked by bm25; there is no typo tolerance. The table is
+# created at startup and rebuilt whenever its triggers are missing.
+
+# Trigram indexes cannot serve shorter terms
+MIN_TERM_LENGTH = 3
+# PostgreSQL runs one candidate lookup per term and column
+MAX_TERMS = 5
+# GET /search paging; skip + limit bounds the candidate lookups
+MAX_LIMIT = 100
+MAX_SKIP = 1000
+
+SEARCH_TABLE = "order_search"
+# bm25 column weights: company_name, product_name, molecule, vendor_company
+BM25_WEIGHTS = (4.0, 4.0, 3.0, 1.0)
+
+class InvalidSearch(ValueError):
+    """Raised when a search query has no term long enough to look up."""
+
+def _vendor_companies(order_id: str) -> str:
+    return (
+        "coalesce((SELECT group_concat(vendor_company, ' ') FROM sub_orders "
+        f"WHERE order_id = {order_id} AND vendor_company IS NOT NULL), '')"
+    )
+
+def _refresh_vendors(order_id: str) -> str:
+    return f"UPDATE {SEARCH_TABLE} SET vendor_company = {_vendor_companies(order_id)} WHERE rowid = {order_id};"
+
+SQLITE_TRIGGERS = {
+    "order_search_order_insert": f"""
+        AFTER INSERT ON orders BEGIN
+            INSERT INTO {SEARCH_TABLE} (rowid, company_name, product_name, molecule, vendor_company)
+            VALUES (new.order_id, new.company_name, new.product_name, new.molecule, '');
+        END""",
+    "order_search_order_update": f"""
+        AFTER UPDATE OF company_name, product_name, molecule ON orders BEGIN
+            UPDATE {SEARCH_TABLE}
+            SET company_name = new.company_name, product_name = new.product_name, molecule = new.molecule
+            WHERE rowid = new.order_id;
+        END""",
+    "order_search_order_delete": f"""
+        AFTER DELETE ON orders BEGIN
+            DELETE FROM {SEARCH_TABLE} WHERE rowid = old.order_id;
+        END""",
+    "order_search_sub_order_insert": f"""
+        AFTER INSERT ON sub_orders WHEN new.vendor_company IS NOT NULL BEGIN
+            {_refresh_vendors("new.order_id")}
+        END""",
+    "order_search_sub_order_update": f"""
+        AFTER UPDATE OF vendor_company, order_id ON sub_orders BEGIN
+            {_refresh_vendors("new.order_id")}
+            {_refresh_vendors("old.order_id")}
+        END""",
+    "order_search_sub_order_delete": f"""
+        AFTER DELETE ON sub_orders WHEN old.vendor_company IS NOT NULL BEGIN
+            {_refresh_vendors("old.order_id")}
+        END""",
+}
+
+# Substring lookups run through these indexes; they need the pg_trgm and
+# btree_gist extensions. GiST rather than GIN because only GiST can return
+# rows in distance order, and order_id (as float8, which GiST can order a
+# lossy distance by) breaks ties inside the index, so many equally close
+# rows never need sorting.
+POSTGRESQL_INDEXES = {
+    "ix_orders_company_name_trgm_knn": ("orders", "company_name"),
+    "ix_orders_product_name_trgm_knn": ("orders", "product_name"),
+    "ix_orders_molecule_trgm_knn": ("orders", "molecule"),
+    "ix_sub_orders_vendor_company_trgm_knn": ("sub_orders", "vendor_company"),
+}
+# The indexes of earlier versions, dropped by install_postgresql
+SUPERSEDED_POSTGRESQL_INDEXES = (
+    "ix_orders_company_name_trgm",
+    "ix_orders_product_name_trgm",
+    "ix_orders_molecule_trgm",
+    "ix_sub_orders_vendor_company_trgm",
+    "ix_orders_company_name_trgm_gist",
+    "ix_orders_product_name_trgm_gist",
+    "ix_orders_molecule_trgm_gist",
+    "ix_sub_orders_vendor_company_trgm_gist",
+)
+# At most one sub-order per ingredient, so this many vendor matches always
+# cover the best N orders
+SUB_ORDERS_PER_ORDER = 8
+
+def install_sqlite(bind) -> bool:
+    """Create the FTS5 table and its triggers; returns True if the index was (re)built."""
+    with bind.begin() as conn:
+        existing = set(conn.exec_driver_sql(
+            "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'order_search_%'"
+        ).scalars())
+        if existing == set(SQLITE_TRIGGERS) and inspect(conn).has_table(SEARCH_TABLE):
+            return False
+        conn.exec_driver_sql(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            "company_name, product_name, molecule, vendor_company, tokenize = 'trigram')"
+        )
+        for name, body in SQLITE_TRIGGERS.items():
+            conn.exec_driver_sql(f"DROP TRIGGER IF EXISTS {name}")
+            conn.exec_driver_sql(f"CREATE TRIGGER {name} {body}")
+        # Without its triggers (e.g. after the tables were dropped) the index
+        # may be stale, so it is rebuilt from the tables
+        conn.exec_driver_sql(f"DELETE FROM {SEARCH_TABLE}")
+        conn.exec_driver_sql(
+            f"INSERT INTO {SEARCH_TABLE} (rowid, company_name, product_name, molecule, vendor_company) "
+            f"SELECT order_id, company_name, product_name, molecule, {_vendor_companies('orders.order_id')} "
+            "FROM orders"
+        )
+    return True
+
+def install_postgresql(bind, concurrently: bool = True) -> List[str]:
+    """Create pg_trgm, btree_gist and the trigram GiST indexes that are missing; returns their names."""
+    created = []
+    with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        conn.execute(text("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+        existing = set(conn.execute(text(
+            "SELECT indexname FROM pg_indexes WHERE tablename IN ('orders', 'sub_orders')"
+        )).scalars())
+        for name, (table_name, column_name) in POSTGRESQL_INDEXES.items():
+            if name in existing:
+                continue
+            conn.execute(text(
+                f"CREATE INDEX {'CONCURRENTLY ' if concurrently else ''}{name} "
+                f"ON {table_name} USING gist ({column_name} gist_trgm_ops, (order_id::float8))"
+            ))
+            created.append(name)
+        for name in existing.intersection(SUPERSEDED_POSTGRESQL_INDEXES):
+            conn.execute(text(f"DROP INDEX {'CONCURRENTLY ' if concurrently else ''}IF EXISTS {name}"))
+    return created
+
+def search_terms(q: str) -> List[str]:
+    """The query's words, each matched as a substring.
+
+    Words shorter than MIN_TERM_LENGTH are joined to the neighbouring word,
+    so "Product 12" looks for the phrase "Product 12" rather than dropping
+    the "12".
+    """
+    terms = []
+    for word in q.split():
+        if terms and (len(word) < MIN_TERM_LENGTH or len(terms[-1]) < MIN_TERM_LENGTH):
+            terms[-1] = f"{terms[-1]} {word}"
+        else:
+            terms.append(word)
+    if not terms or len(terms[-1]) < MIN_TERM_LENGTH:
+        raise InvalidSearch(f"Search terms need at least {MIN_TERM_LENGTH} characters")
+    if len(terms) > MAX_TERMS:
+        raise InvalidSearch(f"Search for at most {MAX_TERMS} terms")
+    return terms
+
+def _sqlite_matches(q: str, skip: int, limit: int):
+    # Every term must appear; quoting makes each one a literal substring
+    match = " ".join('"' + term.replace('"', '""') + '"' for term in search_terms(q))
+    fts = table(SEARCH_TABLE, column("rowid"))
+    rank = func.bm25(literal_column(SEARCH_TABLE), *BM25_WEIGHTS)
+    return (
+        select(fts.c.rowid.label("order_id"), (-rank).label("score"))
+        .where(literal_column(SEARCH_TABLE).op("MATCH")(match))
+        .order_by(rank)
+        .offset(skip)
+        .limit(limit)
+        .subquery()
+    )
+
+def _postgresql_matches(q: str, skip: int, limit: int):
+    terms = search_terms(q)
+    columns = (models.Order.company_name, models.Order.product_name, models.Order.molecule)
+
+    def matches(term: str, column_):
+        pattern = "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+        return or_(column_.ilike(pattern, escape="\\"), literal(term).op("<%")(column_))
+
+    def matches_order(term: str):
+        vendor_match = select(models.SubOrder.order_id).where(matches(term, models.SubOrder.vendor_company))
+        return or_(*(matches(term, column_) for column_ in columns), models.Order.order_id.in_(vendor_match))
+
+    def nearest(term: str, column_, others: list, count: int):
+        # The GiST index walks the column nearest first (<<-> is
+        # 1 - word_similarity, ties mostly by order_id) and stops after
+        # `count` rows that also match the other terms
+        statement = select(models.Order.order_id)
+        if column_ is models.SubOrder.vendor_company:
+            statement = statement.join(models.SubOrder, models.SubOrder.order_id == models.Order.order_id)
+        order_id = cast(column_.class_.order_id, Float)
+        return (
+            statement
+            .where(matches(term, column_), *others)
+            .order_by(literal(term).op("<<->")(column_), order_id.op("<->")(cast(0, Float)))
+            .limit(count)
+        )
+
+    # A column only scores for a term it matches; an order scores its best
+    # column for each term, averaged over the terms
+    def term_score(term: str):
+        vendor_score = (
+            select(func.max(func.word_similarity(term, models.SubOrder.vendor_company)))
+            .where(
+                models.SubOrder.order_id == models.Order.order_id,
+                matches(term, models.SubOrder.vendor_company),
+            )
+            .scalar_subquery()
+        )
+        return func.greatest(
+            *(case((matches(term, column_), func.word_similarity(term, column_)), else_=0) for column_ in columns),
+            func.coalesce(vendor_score, 0),
+        )
+
+    # Candidates are the nearest skip + limit orders matching every term for
+    # each term and column. With one term these hold the best skip + limit
+    # scores; with several, an order that is not among the nearest for any
+    # term and column can be passed over, but only when more than
+    # skip + limit orders match all the terms. A fixed, deepest-page window
+    # would keep equal scores in the same order on every page, but walks the
+    # whole index whenever fewer orders match all the terms.
+    count = skip + limit
+    lookups = []
+    for index, term in enumerate(terms):
+        others = [matches_order(other) for position, other in enumerate(terms) if position != index]
+        lookups += [nearest(term, column_, others, count) for column_ in columns]
+        lookups.append(nearest(term, models.SubOrder.vendor_company, others, count * SUB_ORDERS_PER_ORDER))
+    candidates = union(*lookups).subquery()
+    score = type_coerce(sum(term_score(term) for term in terms) / len(terms), Float)
+    return (
+        select(models.Order.order_id, score.label("score"))
+        .where(models.Order.order_id.in_(select(candidates.c.order_id)))
+        .order_by(score.desc(), models.Order.order_id)
+        .offset(skip)
+        .limit(limit)
+        .subquery()
+    )
+
+def search_statement(dialect: str, q: str, columns, skip: int = 0, limit: int = 20):
+    """`columns` of the best matching orders plus their score, best first."""
+    if dialect == "sqlite":
+        matches = _sqlite_matches(q, skip, limit)
+    elif dialect == "postgresql":
+        matches = _postgresql_matches(q, skip, limit)
+    else:
+        raise InvalidSearch(f"Search is not supported on {dialect}")
+    return (
+        select(*columns, matches.c.score)
+        .join_from(models.Order, matches, models.Order.order_id == matches.c.order_id)
+        .order_by(matches.c.score.desc(), models.Order.order_id)
+    )
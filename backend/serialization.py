@@ -0,0 +1,32 @@
+import json
+from datetime import datetime
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+# JSON encoding for responses built from plain rows. orjson is used when it is
+# installed (it encodes datetimes natively and is several times faster than
+# the standard library); otherwise this falls back to json.dumps.
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def dumps(content: Any) -> bytes:
+    """Encode dicts, lists, strings, numbers and naive datetimes as JSON bytes."""
+    if orjson is not None:
+        # Naive datetimes are written without a UTC offset, as Pydantic does
+        return orjson.dumps(content)
+    return json.dumps(content, default=_default, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+class FastJSONResponse(JSONResponse):
+    """A JSONResponse for content that is already JSON-ready, skipping
+    response_model validation when returned directly from a handler."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,173 @@
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+from logging.handlers import RotatingFileHandler
+from typing import Optional
+
+from sqlalchemy import event
+
+try:
+    from greenlet import getcurrent
+except ImportError:  # pragma: no cover - only installed with async support
+    getcurrent = None
+
+from backend import metrics
+from config.database import env_flag
+
+# Slow-query log. Statements slower than SLOW_QUERY_MS are written as one JSON
+# object per line to a rotating file, with redacted parameters, the route and
+# CRUD function that issued them and the database's EXPLAIN plan. Fast
+# statements only cost two perf_counter() calls.
+
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "250"))  # 0 disables the log
+SLOW_QUERY_LOG = os.getenv("SLOW_QUERY_LOG", "logs/slow_queries.log")
+SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+SLOW_QUERY_LOG_BACKUPS = int(os.getenv("SLOW_QUERY_LOG_BACKUPS", "5"))
+SLOW_QUERY_EXPLAIN = env_flag("SLOW_QUERY_EXPLAIN", True)
+# EXPLAIN ANALYZE runs the statement a second time, so it is only used for
+# SELECTs and is off by default
+SLOW_QUERY_EXPLAIN_ANALYZE = env_flag("SLOW_QUERY_EXPLAIN_ANALYZE", False)
+
+EXPLAIN_PREFIXES = {
+    "postgresql": "EXPLAIN (FORMAT JSON) ",
+    "sqlite": "EXPLAIN QUERY PLAN ",
+}
+EXPLAIN_ANALYZE_PREFIXES = {
+    "postgresql": "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ",
+}
+EXPLAINABLE = {"SELECT", "INSERT", "UPDATE", "DELETE", "WITH"}
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+CALLER_MODULES = ("crud.py", "crud_async.py", "order_export.py", "order_import.py", "auth.py", "auth_async.py")
+
+logger = logging.getLogger("pharma.slow_query")
+logger.propagate = False
+_handler_lock = threading.Lock()
+
+def _ensure_handler():
+    # Opened on the first slow statement so importing the module creates no files
+    if logger.handlers:
+        return
+    with _handler_lock:
+        if logger.handlers:
+            return
+        directory = os.path.dirname(SLOW_QUERY_LOG)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        handler = RotatingFileHandler(SLOW_QUERY_LOG, maxBytes=SLOW_QUERY_LOG_MAX_BYTES,
+                                      backupCount=SLOW_QUERY_LOG_BACKUPS, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.WARNING)
+
+def redact(parameters, executemany: bool):
+    """Parameter types (and string lengths) without their values."""
+    if executemany:
+        return {"rows": len(parameters)}
+
+    def describe(value):
+        if value is None:
+            return None
+        if isinstance(value, (str, bytes)):
+            return f"{type(value).__name__}({len(value)})"
+        return type(value).__name__
+
+    if isinstance(parameters, dict):
+        return {name: describe(value) for name, value in parameters.items()}
+    return [describe(value) for value in parameters or ()]
+
+def _stack_frames():
+    frame = sys._getframe(2)
+    while frame is not None:
+        yield frame
+        frame = frame.f_back
+    # Async engines run the driver call in a greenlet; the crud_async
+    # coroutine that awaits it is on the parent greenlet's stack
+    if getcurrent is not None and getcurrent().parent is not None:
+        frame = getcurrent().parent.gr_frame
+        while frame is not None:
+            yield frame
+            frame = frame.f_back
+
+def calling_function() -> Optional[str]:
+    """The innermost backend data-access function on the stack, e.g. crud.get_sub_orders."""
+    for frame in _stack_frames():
+        filename = frame.f_code.co_filename
+        if os.path.dirname(os.path.abspath(filename)) == BACKEND_DIR and os.path.basename(filename) in CALLER_MODULES:
+            return f"{os.path.basename(filename)[:-3]}.{frame.f_code.co_name}"
+    return None
+
+def explain(conn, statement: str, parameters, analyze: bool):
+    """The plan for `statement`, run on the same DBAPI connection outside SQLAlchemy's events."""
+    dialect = conn.dialect.name
+    prefix = (EXPLAIN_ANALYZE_PREFIXES if analyze else EXPLAIN_PREFIXES).get(dialect)
+    if prefix is None:
+        return None
+    cursor = conn.connection.cursor()
+    # A failed EXPLAIN must not abort the caller's PostgreSQL transaction
+    guarded = dialect == "postgresql"
+    try:
+        if guarded:
+            cursor.execute("SAVEPOINT slow_query_explain")
+        cursor.execute(prefix + statement, parameters)
+        rows = cursor.fetchall()
+        if dialect == "postgresql":
+            plan = rows[0][0]
+            return json.loads(plan) if isinstance(plan, str) else plan
+        # SQLite: (id, parent, notused, detail)
+        return [row[-1] for row in rows]
+    finally:
+        if guarded:
+            # Also undoes anything EXPLAIN ANALYZE wrote
+            cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+        cursor.close()
+
+def log_slow_query(conn, statement: str, parameters, executemany: bool, elapsed: float):
+    operation = metrics.statement_operation(statement)
+    request = metrics.current_request()
+    record = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "duration_ms": round(elapsed * 1000, 2),
+        "threshold_ms": SLOW_QUERY_MS,
+        "method": request.method if request else None,
+        "route": request.route if request else None,
+        "caller": calling_function(),
+        "operation": operation,
+        "statement": statement,
+        "parameters": redact(parameters, executemany),
+    }
+    if SLOW_QUERY_EXPLAIN and operation in EXPLAINABLE and not executemany:
+        analyze = SLOW_QUERY_EXPLAIN_ANALYZE and operation in ("SELECT", "WITH")
+        try:
+            record["plan"] = explain(conn, statement, parameters, analyze)
+        except Exception as e:
+            record["explain_error"] = str(e)
+    _ensure_handler()
+    logger.warning(json.dumps(record, default=str))
+
+def instrument_engine(engine, threshold_ms: float = SLOW_QUERY_MS):
+    """Log statements on a (sync) engine that run longer than threshold_ms."""
+    if threshold_ms <= 0:
+        return
+    threshold = threshold_ms / 1000
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["slow_query_start"].pop()
+        if elapsed >= threshold:
+            log_slow_query(conn, statement, parameters, executemany, elapsed)
+
+    @event.listens_for(engine, "handle_error")
+    def handle_error(context):
+        starts = context.connection.info.get("slow_query_start") if context.connection is not None else None
+        if starts:
+            starts.pop()
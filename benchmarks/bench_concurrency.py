@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Benchmark API throughput under concurrent load with DATABASE_MODE=sync
+(threadpool handlers, sync engine) versus DATABASE_MODE=async (coroutine
+handlers, AsyncSession).
+
+Seeds a database, starts one uvicorn server per mode against it and drives
+GET /orders/ from a pool of client threads, reporting requests/second and
+latency percentiles.
+
+Usage:
+    python benchmarks/bench_concurrency.py
+    python benchmarks/bench_concurrency.py --concurrency 16 64 256 --database-url postgresql+psycopg2://...
+"""
+import argparse
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import make_engine, percentile, running_server, scratch_database, seed_orders
+
+
+def drive(base_url: str, concurrency: int, total: int, limit: int) -> dict:
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount("http://", adapter)
+
+    def one_request(i):
+        start = time.perf_counter()
+        response = session.get(f"{base_url}/orders/", params={"skip": (i * limit) % 1000, "limit": limit})
+        response.raise_for_status()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(one_request, range(total)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests_per_second": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="sync database URL (default: a temporary SQLite file)")
+    parser.add_argument("--orders", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20, help="page size of each GET /orders/")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32, 128])
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    with scratch_database(args.database_url) as database_url:
+        engine, _ = make_engine(database_url)
+        seed_orders(engine, args.orders)
+        engine.dispose()
+
+        for mode in ("sync", "async"):
+            with running_server({"DATABASE_MODE": mode}, database_url) as base_url:
+                for concurrency in args.concurrency:
+                    row = {"mode": mode, "concurrency": concurrency}
+                    row.update(drive(base_url, concurrency, args.requests, args.limit))
+                    results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':>6} {'concurrency':>12} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for row in results:
+        print(f"{row['mode']:>6} {row['concurrency']:>12} {row['requests_per_second']:>9} "
+              f"{row['p50_ms']:>9} {row['p95_ms']:>9} {row['p99_ms']:>9}")
+
+
+if __name__ == "__main__":
+    main()
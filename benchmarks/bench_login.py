@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark a login burst against the latency of unrelated endpoints, with
+bcrypt running inline on request threads (HASH_WORKERS=0) versus in the
+hashing process pool.
+
+For each configuration a uvicorn server is started, one user is registered
+and `--login-concurrency` client threads log in repeatedly while a single
+probe thread times GET /orders/{id}. Logins rejected with 503 (hashing
+queue full) are counted separately.
+
+Usage:
+    python benchmarks/bench_login.py
+    python benchmarks/bench_login.py --workers 2 4 --bcrypt-rounds 12 --duration 20
+"""
+import argparse
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from common import make_engine, percentile, running_server, scratch_database, seed_orders
+
+USER = {
+    "username": "bench",
+    "email": "bench@example.com",
+    "password": "bench-password",
+    "first_name": "Bench",
+    "last_name": "User",
+}
+
+
+def login_loop(base_url: str, stop: threading.Event, counts: dict, lock: threading.Lock):
+    session = requests.Session()
+    credentials = {"username": USER["username"], "password": USER["password"]}
+    while not stop.is_set():
+        status_code = session.post(f"{base_url}/login", json=credentials).status_code
+        with lock:
+            counts[status_code] = counts.get(status_code, 0) + 1
+
+
+def probe_loop(base_url: str, stop: threading.Event, latencies: list):
+    session = requests.Session()
+    while not stop.is_set():
+        start = time.perf_counter()
+        session.get(f"{base_url}/orders/1").raise_for_status()
+        latencies.append((time.perf_counter() - start) * 1000)
+        time.sleep(0.01)
+
+
+def run(base_url: str, login_concurrency: int, duration: float) -> dict:
+    requests.post(f"{base_url}/register", json=USER)
+
+    stop = threading.Event()
+    counts, lock, latencies = {}, threading.Lock(), []
+    with ThreadPoolExecutor(max_workers=login_concurrency + 1) as pool:
+        pool.submit(probe_loop, base_url, stop, latencies)
+        for _ in range(login_concurrency):
+            pool.submit(login_loop, base_url, stop, counts, lock)
+        time.sleep(duration)
+        stop.set()
+
+    return {
+        "logins_per_second": round(counts.get(200, 0) / duration, 1),
+        "rejected_503": counts.get(503, 0),
+        "probe_p50_ms": round(percentile(latencies, 50), 2),
+        "probe_p95_ms": round(percentile(latencies, 95), 2),
+        "probe_p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="sync database URL (default: a temporary SQLite file)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[2],
+                        help="HASH_WORKERS values to compare with inline hashing")
+    parser.add_argument("--bcrypt-rounds", type=int, default=12)
+    parser.add_argument("--login-concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per configuration")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    with scratch_database(args.database_url) as database_url:
+        engine, _ = make_engine(database_url)
+        seed_orders(engine, 10)
+        engine.dispose()
+
+        for workers in [0] + args.workers:
+            env = {"HASH_WORKERS": str(workers), "BCRYPT_ROUNDS": str(args.bcrypt_rounds)}
+            with running_server(env, database_url) as base_url:
+                row = {"hashing": "inline" if workers == 0 else f"pool({workers})"}
+                row.update(run(base_url, args.login_concurrency, args.duration))
+                results.append(row)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'hashing':>9} {'logins/s':>9} {'503s':>6} {'probe p50':>10} {'probe p95':>10} {'probe p99':>10}")
+    for row in results:
+        print(f"{row['hashing']:>9} {row['logins_per_second']:>9} {row['rejected_503']:>6} "
+              f"{row['probe_p50_ms']:>10} {row['probe_p95_ms']:>10} {row['probe_p99_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
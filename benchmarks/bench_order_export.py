@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark exporting the whole order book: paging through GET /orders/
+(ORM objects, Pydantic models and one JSON list per page) versus the
+streamed NDJSON export behind GET /orders/export.
+
+Reports total time, time to the first byte and peak Python memory
+(tracemalloc) for each table size.
+
+Usage:
+    python benchmarks/bench_order_export.py
+    python benchmarks/bench_order_export.py --sizes 10000 100000 --database-url postgresql+psycopg2://...
+"""
+import argparse
+import json
+import time
+import tracemalloc
+
+from common import make_engine, seed_orders
+
+from backend import crud, order_export, pagination, schemas
+
+
+def export_paged(engine, Session, page_size: int):
+    """Page with keyset cursors, serializing each page like the list endpoint."""
+    first_byte = None
+    cursor = None
+    with Session() as db:
+        while True:
+            orders = crud.get_orders(db, limit=page_size, cursor=cursor)
+            body = json.dumps([schemas.Order.model_validate(order).model_dump(mode="json") for order in orders])
+            if first_byte is None:
+                first_byte = time.perf_counter()
+            if len(orders) < page_size:
+                return first_byte, len(body)
+            sort_by = schemas.OrderSortEnum.ORDER_ID
+            cursor = pagination.next_cursor(orders, crud.ORDER_SORT_KEYS[sort_by], sort_by.value, page_size)
+            db.expunge_all()
+
+
+def export_streamed(engine, Session, page_size: int):
+    first_byte = None
+    for chunk in order_export.export_orders(engine, schemas.FileFormatEnum.NDJSON):
+        if first_byte is None:
+            first_byte = time.perf_counter()
+    return first_byte, len(chunk)
+
+
+def measure(fn, engine, Session, page_size: int) -> dict:
+    tracemalloc.start()
+    start = time.perf_counter()
+    first_byte, _ = fn(engine, Session, page_size)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "seconds": round(elapsed, 3),
+        "first_byte_ms": round((first_byte - start) * 1000, 2),
+        "peak_mb": round(peak / 1024 / 1024, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--page-size", type=int, default=100, help="page size for the paged export")
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    for size in args.sizes:
+        engine, Session = make_engine(args.database_url)
+        seed_orders(engine, size)
+        for name, fn in (("paged", export_paged), ("streamed", export_streamed)):
+            row = {"orders": size, "method": name}
+            row.update(measure(fn, engine, Session, args.page_size))
+            results.append(row)
+        engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'orders':>8} {'method':>9} {'seconds':>9} {'first byte ms':>14} {'peak MB':>9}")
+    for row in results:
+        print(f"{row['orders']:>8} {row['method']:>9} {row['seconds']:>9} {row['first_byte_ms']:>14} {row['peak_mb']:>9}")
+
+
+if __name__ == "__main__":
+    main()
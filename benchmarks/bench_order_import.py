@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Benchmark order import throughput: one crud.create_order call per order
+versus the streamed NDJSON bulk import used by POST /orders/import.
+
+Usage:
+    python benchmarks/bench_order_import.py
+    python benchmarks/bench_order_import.py --orders 20000 --database-url postgresql+psycopg2://...
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from common import make_engine, order_row
+
+from backend import crud, order_import, schemas
+
+
+def ndjson_payload(count: int) -> bytes:
+    lines = []
+    for i in range(count):
+        row = order_row(i)
+        row["order_date"] = row["order_date"].isoformat()
+        lines.append(json.dumps(row))
+    return ("\n".join(lines) + "\n").encode()
+
+
+async def chunked(payload: bytes, size: int = 64 * 1024):
+    for start in range(0, len(payload), size):
+        yield payload[start:start + size]
+
+
+def bench_single(Session, count: int) -> float:
+    orders = [schemas.OrderCreate(**order_row(i)) for i in range(count)]
+    start = time.perf_counter()
+    with Session() as db:
+        for order in orders:
+            crud.create_order(db, order)
+    return time.perf_counter() - start
+
+
+def bench_bulk(Session, count: int, batch_size: int) -> float:
+    payload = ndjson_payload(count)
+    start = time.perf_counter()
+    with Session() as db:
+        result = asyncio.run(order_import.import_orders(
+            chunked(payload), schemas.FileFormatEnum.NDJSON, db, batch_size=batch_size
+        ))
+    elapsed = time.perf_counter() - start
+    assert result.imported == count, result.errors[:5]
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=order_import.IMPORT_BATCH_SIZE)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    for name, bench in (("create_order", lambda S: bench_single(S, args.orders)),
+                        ("bulk_import", lambda S: bench_bulk(S, args.orders, args.batch_size))):
+        engine, Session = make_engine(args.database_url)
+        elapsed = bench(Session)
+        engine.dispose()
+        results.append({
+            "method": name,
+            "orders": args.orders,
+            "seconds": round(elapsed, 3),
+            "orders_per_second": round(args.orders / elapsed),
+        })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'method':>14} {'orders':>8} {'seconds':>9} {'orders/s':>10}")
+    for row in results:
+        print(f"{row['method']:>14} {row['orders']:>8} {row['seconds']:>9} {row['orders_per_second']:>10}")
+
+
+if __name__ == "__main__":
+    main()
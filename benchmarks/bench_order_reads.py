@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark order list/detail reads with lazy versus eager sub-order loading.
+
+Reads a page holding every order (so page size == table size) and reports
+the number of SQL statements issued and the wall time, including the
+Pydantic serialization done by the API handlers.
+
+Usage:
+    python benchmarks/bench_order_reads.py
+    python benchmarks/bench_order_reads.py --sizes 100 1000 --database-url postgresql+psycopg2://...
+"""
+import argparse
+import json
+
+from common import QueryCounter, make_engine, seed_orders, timed
+
+from backend import crud, models, schemas
+
+
+def read_list(db, size: int, loader):
+    if loader is None:
+        # Pre-eager-loading behaviour: sub_orders is lazy loaded per order
+        orders = db.query(models.Order).offset(0).limit(size).all()
+    else:
+        orders = crud.get_orders(db, skip=0, limit=size, loader=loader)
+    return [schemas.Order.model_validate(order) for order in orders]
+
+
+def read_detail(db, order_id: int, loader):
+    if loader is None:
+        order = db.query(models.Order).filter(models.Order.order_id == order_id).first()
+    else:
+        order = crud.get_order(db, order_id=order_id, loader=loader)
+    return schemas.Order.model_validate(order)
+
+
+def run(database_url: str, sizes):
+    results = []
+    for size in sizes:
+        engine, Session = make_engine(database_url)
+        seed_orders(engine, size)
+        for loader in (None, "selectin", "joined"):
+            row = {"orders": size, "loader": loader or "lazy"}
+            with Session() as db, QueryCounter(engine) as counter, timed(row, "list_ms"):
+                read_list(db, size, loader)
+            row["list_queries"] = counter.count
+            with Session() as db, QueryCounter(engine) as counter, timed(row, "detail_ms"):
+                read_detail(db, size // 2, loader)
+            row["detail_queries"] = counter.count
+            results.append(row)
+        engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.database_url, args.sizes)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'orders':>8} {'loader':>9} {'list queries':>13} {'list ms':>10} {'detail queries':>15} {'detail ms':>10}")
+    for row in results:
+        print(f"{row['orders']:>8} {row['loader']:>9} {row['list_queries']:>13} {row['list_ms']:>10} "
+              f"{row['detail_queries']:>15} {row['detail_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Benchmark row writes per order update: the previous delete-and-recreate
+sub-order handling versus the diff-based reconciliation in crud.update_order.
+
+Each scenario sends the full payload the Update Order page submits (all
+eight ingredient fields), so the legacy path rewrites every sub-order even
+when no ingredient changed.
+
+Usage:
+    python benchmarks/bench_order_update.py
+    python benchmarks/bench_order_update.py --orders 500 --database-url postgresql+psycopg2://...
+"""
+import argparse
+import json
+
+from common import INGREDIENTS, RowWriteCounter, make_engine, seed_orders, timed
+
+from backend import crud, models, schemas
+
+
+def legacy_update_order(db, order_id: int, order_update: schemas.OrderUpdate):
+    """The update path before reconciliation: drop and re-create every sub-order."""
+    db_order = db.query(models.Order).filter(models.Order.order_id == order_id).first()
+    update_data = order_update.dict(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(db_order, field, value)
+    if any(field in update_data for field in INGREDIENTS):
+        db.query(models.SubOrder).filter(models.SubOrder.order_id == order_id).delete()
+        for ingredient_name in INGREDIENTS:
+            if getattr(db_order, ingredient_name) == "Y":
+                db.add(models.SubOrder(
+                    order_id=db_order.order_id,
+                    ingredient_type=ingredient_name,
+                    status="Open",
+                    main_order_date=db_order.order_date
+                ))
+    db.commit()
+    db.refresh(db_order)
+    return db_order
+
+
+def full_payload(order: models.Order, flip: str = None) -> schemas.OrderUpdate:
+    """The form payload of the Update Order page, optionally flipping one ingredient."""
+    data = {
+        "company_name": order.company_name,
+        "product_name": order.product_name,
+        "molecule": order.molecule,
+        "status": order.status,
+        "quantity": order.quantity,
+        "pack": order.pack,
+        "order_date": order.order_date,
+    }
+    for ingredient in INGREDIENTS:
+        data[ingredient] = getattr(order, ingredient)
+    if flip:
+        data[flip] = "N" if data[flip] == "Y" else "Y"
+    return schemas.OrderUpdate(**data)
+
+
+SCENARIOS = {
+    "no ingredient change": None,
+    "one ingredient flipped": "label",
+}
+
+
+def run(database_url: str, orders: int):
+    results = []
+    for implementation, update in (("delete+recreate", legacy_update_order), ("reconcile", crud.update_order)):
+        for scenario, flip in SCENARIOS.items():
+            engine, Session = make_engine(database_url)
+            seed_orders(engine, orders)
+            row = {"implementation": implementation, "scenario": scenario, "updates": orders}
+            with Session() as db:
+                payloads = [(o.order_id, full_payload(o, flip)) for o in db.query(models.Order).all()]
+            with Session() as db, RowWriteCounter(engine) as writes, timed(row, "total_ms"):
+                for order_id, payload in payloads:
+                    update(db, order_id, payload)
+            row["row_writes"] = writes.total
+            row["row_writes_per_update"] = round(writes.total / orders, 2)
+            row["sub_order_rows_written"] = writes.inserted + writes.deleted
+            results.append(row)
+            engine.dispose()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--orders", type=int, default=1000)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = run(args.database_url, args.orders)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'implementation':>16} {'scenario':>24} {'writes/update':>14} {'total ms':>10}")
+    for row in results:
+        print(f"{row['implementation']:>16} {row['scenario']:>24} {row['row_writes_per_update']:>14} {row['total_ms']:>10}")
+
+
+if __name__ == "__main__":
+    main()
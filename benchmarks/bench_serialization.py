@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark the GET /orders/ page path: ORM objects validated into
+schemas.Order and then re-validated/serialized through response_model (the
+previous handler), versus Core rows turned into dicts and encoded with
+backend.serialization (orjson when installed, else the json module).
+
+Reports orders per second for serialization alone (data already loaded) and
+for the full read (query + serialization) of one page.
+
+Usage:
+    python benchmarks/bench_serialization.py
+    python benchmarks/bench_serialization.py --page-size 500 --repeat 50
+"""
+import argparse
+import json
+import time
+from typing import List
+
+from pydantic import TypeAdapter
+
+from common import make_engine, seed_orders
+
+from backend import crud, schemas, serialization
+
+# What FastAPI does with a handler's return value when response_model is set
+RESPONSE_ADAPTER = TypeAdapter(List[schemas.Order])
+
+
+def encode_models(orders) -> bytes:
+    content = [schemas.Order.model_validate(order) for order in orders]
+    validated = RESPONSE_ADAPTER.validate_python(content, from_attributes=True)
+    return json.dumps(RESPONSE_ADAPTER.dump_python(validated, mode="json")).encode("utf-8")
+
+
+def encode_rows(rows) -> bytes:
+    return serialization.dumps(crud.order_dicts(*rows))
+
+
+def encode_rows_stdlib(rows) -> bytes:
+    orjson, serialization.orjson = serialization.orjson, None
+    try:
+        return serialization.dumps(crud.order_dicts(*rows))
+    finally:
+        serialization.orjson = orjson
+
+
+def rate(fn, repeat: int, page_size: int) -> float:
+    fn()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round(repeat * page_size / (time.perf_counter() - start))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    engine, Session = make_engine(args.database_url)
+    seed_orders(engine, args.page_size)
+    size = args.page_size
+
+    results = []
+    with Session() as db:
+        orders = crud.get_orders(db, limit=size)
+        rows = crud.get_order_rows(db, limit=size)
+        paths = [
+            ("models + response_model", lambda: encode_models(orders),
+             lambda: encode_models(crud.get_orders(db, limit=size))),
+            ("rows + orjson" if serialization.orjson else "rows + json", lambda: encode_rows(rows),
+             lambda: encode_rows(crud.get_order_rows(db, limit=size))),
+        ]
+        if serialization.orjson is not None:
+            paths.append(("rows + json", lambda: encode_rows_stdlib(rows),
+                          lambda: encode_rows_stdlib(crud.get_order_rows(db, limit=size))))
+        for name, serialize, read in paths:
+            # Each full read must start from an empty identity map, as in a request
+            def fresh_read():
+                db.expunge_all()
+                read()
+            results.append({
+                "path": name,
+                "serialize_orders_per_second": rate(serialize, args.repeat, size),
+                "read_orders_per_second": rate(fresh_read, args.repeat, size),
+            })
+    engine.dispose()
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'path':>24} {'serialize orders/s':>19} {'query+serialize orders/s':>25}")
+    for row in results:
+        print(f"{row['path']:>24} {row['serialize_orders_per_second']:>19} {row['read_orders_per_second']:>25}")
+
+
+if __name__ == "__main__":
+    main()
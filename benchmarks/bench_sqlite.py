@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Benchmark the embedded SQLite mode against stock SQLite settings and,
+optionally, PostgreSQL under a mixed read/write load.
+
+Each configuration gets a freshly seeded database. `--workers` processes
+(standing in for uvicorn workers) each run `--writers` threads doing the
+order/sub-order updates behind PUT /orders/{id} and PUT
+/sub-orders/{id}/status, and `--readers` threads reading 50-order pages as
+GET /orders/ does. Reports reads and writes per second, write latency and
+how many writes failed with "database is locked".
+
+Configurations:
+    sqlite (stock)  rollback journal, synchronous=FULL, 5s busy timeout
+    sqlite (WAL)    config.database SQLITE_PRAGMAS (WAL, synchronous=NORMAL,
+                    mmap, cache_size, 10s busy timeout)
+    sqlite (WAL+q)  the same plus the WriteLock queue (SQLITE_SERIALIZE_WRITES)
+    postgresql      only with --postgres-url (the tables are recreated)
+
+Usage:
+    python benchmarks/bench_sqlite.py
+    python benchmarks/bench_sqlite.py --workers 4 --orders 50000 --postgres-url postgresql+psycopg2://...
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import threading
+import time
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import sessionmaker
+
+from common import make_engine, percentile, scratch_database, seed_orders
+
+from backend import crud, schemas
+from config.database import SQLITE_PRAGMAS, engine_options
+from config.pool import PoolTelemetry
+from config.sqlite import configure_sqlite
+
+STATUSES = list(schemas.StatusEnum)
+
+
+def worker(database_url: str, tuning: str, args: dict, results):
+    engine = create_engine(database_url, **engine_options(database_url))
+    PoolTelemetry().attach(engine.pool)
+    if tuning:
+        configure_sqlite(engine, SQLITE_PRAGMAS, serialize_writes=tuning == "queue")
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    deadline = time.perf_counter() + args["duration"]
+    lock = threading.Lock()
+    stats = {"reads": 0, "writes": 0, "locked": 0, "write_ms": []}
+
+    def write_loop(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                with Session() as db:
+                    if rng.random() < 0.5:
+                        crud.update_order(db, rng.randint(1, args["orders"]),
+                                          schemas.OrderUpdate(quantity=rng.randint(1, 1000)))
+                    else:
+                        crud.update_sub_order_status(db, rng.randint(1, args["sub_orders"]), rng.choice(STATUSES))
+                outcome = "writes"
+            except exc.OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                outcome = "locked"
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with lock:
+                stats[outcome] += 1
+                stats["write_ms"].append(elapsed_ms)
+
+    def read_loop(seed):
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            with Session() as db:
+                crud.get_order_rows(db, skip=rng.randrange(max(args["orders"] - 50, 1)), limit=50)
+            with lock:
+                stats["reads"] += 1
+
+    seed = args["seed"] * 1000
+    threads = [threading.Thread(target=write_loop, args=(seed + i,)) for i in range(args["writers"])]
+    threads += [threading.Thread(target=read_loop, args=(seed + 500 + i,)) for i in range(args["readers"])]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+    results.put(stats)
+
+
+def run(name: str, database_url: str, tuning: str, args) -> dict:
+    engine, _ = make_engine(database_url)
+    seed_orders(engine, args.orders)
+    with engine.connect() as conn:
+        sub_orders = conn.exec_driver_sql("SELECT max(sub_order_id) FROM sub_orders").scalar()
+    engine.dispose()
+
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    options = {"orders": args.orders, "sub_orders": sub_orders, "duration": args.duration,
+               "writers": args.writers, "readers": args.readers}
+    processes = [
+        context.Process(target=worker, args=(database_url, tuning, dict(options, seed=args.seed + i), results))
+        for i in range(args.workers)
+    ]
+    for process in processes:
+        process.start()
+    collected = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+
+    write_ms = [ms for stats in collected for ms in stats["write_ms"]]
+    return {
+        "config": name,
+        "reads_per_second": round(sum(s["reads"] for s in collected) / args.duration, 1),
+        "writes_per_second": round(sum(s["writes"] for s in collected) / args.duration, 1),
+        "locked_errors": sum(s["locked"] for s in collected),
+        "write_p50_ms": round(percentile(write_ms, 50), 2) if write_ms else None,
+        "write_p95_ms": round(percentile(write_ms, 95), 2) if write_ms else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--postgres-url", default=None, help="also run against this PostgreSQL database")
+    parser.add_argument("--orders", type=int, default=10000)
+    parser.add_argument("--workers", type=int, default=2, help="processes, as uvicorn --workers")
+    parser.add_argument("--writers", type=int, default=4, help="writing threads per process")
+    parser.add_argument("--readers", type=int, default=4, help="reading threads per process")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per configuration")
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--json", action="store_true", help="print machine-readable results")
+    args = parser.parse_args()
+
+    results = []
+    for name, tuning in (("sqlite (stock)", None), ("sqlite (WAL)", "wal"), ("sqlite (WAL+q)", "queue")):
+        with scratch_database() as database_url:
+            results.append(run(name, database_url, tuning, args))
+    if args.postgres_url:
+        results.append(run("postgresql", args.postgres_url, None, args))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'config':>16} {'reads/s':>9} {'writes/s':>9} {'locked':>7} {'write p50 ms':>13} {'write p95 ms':>13}")
+    for row in results:
+        print(f"{row['config']:>16} {row['reads_per_second']:>9} {row['writes_per_second']:>9} "
+              f"{row['locked_errors']:>7} {row['write_p50_ms']!s:>13} {row['write_p95_ms']!s:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Shared helpers for the benchmark scripts: database setup, seeding, query
+counting and running the API in a uvicorn subprocess.
+"""
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(PROJECT_ROOT)
+
+# The backend builds its engine at import time, so point it at a throwaway
+# database unless the caller has configured one.
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from backend import models
+
+INGREDIENTS = ["carton", "label", "rm", "sterios", "bottles", "m_cups", "caps", "shippers"]
+COMPANIES = ["ABC Pharma", "XYZ Healthcare", "MediCorp", "Sunrise Labs", "Nova Generics"]
+STATUSES = ["Open", "In-Process", "Closed"]
+
+
+def make_engine(database_url: str = "sqlite://"):
+    """Create an engine and an empty schema for a benchmark run."""
+    if database_url in ("sqlite://", "sqlite:///:memory:"):
+        engine = create_engine(
+            database_url,
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool,
+        )
+    else:
+        engine = create_engine(database_url)
+    models.Base.metadata.drop_all(bind=engine)
+    models.Base.metadata.create_all(bind=engine)
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def order_row(i: int) -> dict:
+    """Deterministic order payload; every third ingredient is marked 'Y'."""
+    row = {
+        "company_name": COMPANIES[i % len(COMPANIES)],
+        "product_name": f"Product {i}",
+        "molecule": f"Molecule {i % 50}",
+        "status": STATUSES[i % len(STATUSES)],
+        "quantity": 100 + i % 900,
+        "pack": "Bottle",
+        "order_date": datetime(2024, 1, 1) + timedelta(minutes=i),
+    }
+    for n, ingredient in enumerate(INGREDIENTS):
+        row[ingredient] = "Y" if (i + n) % 3 == 0 else "N"
+    return row
+
+
+def seed_orders(engine, count: int, batch_size: int = 1000):
+    """Insert `count` orders plus their ingredient sub-orders."""
+    with engine.begin() as conn:
+        for start in range(0, count, batch_size):
+            rows = [order_row(i) for i in range(start, min(start + batch_size, count))]
+            order_ids = conn.execute(
+                insert(models.Order).returning(models.Order.order_id, sort_by_parameter_order=True),
+                rows,
+            ).scalars().all()
+            sub_rows = [
+                {
+                    "order_id": order_id,
+                    "ingredient_type": ingredient,
+                    "status": "Open",
+                    "main_order_date": row["order_date"],
+                }
+                for order_id, row in zip(order_ids, rows)
+                for ingredient in INGREDIENTS
+                if row[ingredient] == "Y"
+            ]
+            if sub_rows:
+                conn.execute(insert(models.SubOrder), sub_rows)
+
+
+class QueryCounter:
+    """Counts statements sent to the database while active."""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.statements = []
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._on_execute)
+
+
+class RowWriteCounter:
+    """Counts rows inserted, updated and deleted while active.
+
+    UPDATE/DELETE rows come from the cursor row counts, which covers both ORM
+    flushes and bulk statements; inserts are counted per ORM object because
+    batched INSERT ... RETURNING does not report a usable row count.
+    """
+
+    MODELS = (models.Order, models.SubOrder)
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.inserted = 0
+        self.updated = 0
+        self.deleted = 0
+
+    @property
+    def total(self):
+        return self.inserted + self.updated + self.deleted
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        verb = statement.lstrip().split(None, 1)[0].upper()
+        if verb == "UPDATE":
+            self.updated += max(cursor.rowcount, 0)
+        elif verb == "DELETE":
+            self.deleted += max(cursor.rowcount, 0)
+
+    def _on_insert(self, mapper, connection, target):
+        self.inserted += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "after_cursor_execute", self._on_execute)
+        for model in self.MODELS:
+            event.listen(model, "after_insert", self._on_insert)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "after_cursor_execute", self._on_execute)
+        for model in self.MODELS:
+            event.remove(model, "after_insert", self._on_insert)
+
+
+@contextmanager
+def timed(results: dict, key: str):
+    """Store the elapsed wall time of the block in milliseconds."""
+    start = time.perf_counter()
+    yield
+    results[key] = round((time.perf_counter() - start) * 1000, 2)
+
+
+@contextmanager
+def scratch_database(database_url=None):
+    """Yield `database_url`, or a temporary SQLite file that is removed afterwards.
+
+    Servers started with start_server run in their own process, so they
+    cannot share an in-memory database with the benchmark.
+    """
+    if database_url is not None:
+        yield database_url
+        return
+    scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+    scratch.close()
+    try:
+        yield f"sqlite:///{scratch.name}"
+    finally:
+        remove_database_files(scratch.name)
+
+
+def remove_database_files(path: str):
+    """Delete a SQLite database and the WAL and write-lock files kept next to it."""
+    for suffix in ("", "-wal", "-shm", "-writelock"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextmanager
+def running_server(env: dict, database_url: str):
+    """Run backend.main:app under uvicorn with extra environment; yield its base URL."""
+    import requests
+
+    port = free_port()
+    server_env = dict(os.environ, DATABASE_URL=database_url, **env)
+    server_env.pop("ASYNC_DATABASE_URL", None)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=PROJECT_ROOT,
+        env=server_env,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        for _ in range(100):
+            try:
+                requests.get(base_url + "/", timeout=1)
+                break
+            except requests.ConnectionError:
+                time.sleep(0.1)
+        else:
+            raise RuntimeError(f"server with {env} did not start")
+        yield base_url
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
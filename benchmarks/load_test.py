@@ -0,0 +1,283 @@
+#!/usr/bin/env python3
+"""
+Reproducible load test for the API.
+
+Seeds a scratch database, starts backend.main:app under uvicorn inside this
+process and runs `--users` virtual users concurrently. Each user logs in
+once, then picks operations from a weighted mix (login, create order, list
+orders, update order, change sub-order status) with a fixed random seed. The
+report gives throughput, error count and p50/p95/p99 latency per operation
+as JSON.
+
+Pass `--baseline` with an earlier report to fail (exit status 1) when an
+operation's p95 latency or throughput regresses by more than `--tolerance`.
+
+Usage:
+    python benchmarks/load_test.py --output baseline.json
+    python benchmarks/load_test.py --users 32 --duration 60 --baseline baseline.json
+    python benchmarks/load_test.py --mix list_orders=80,update_order=20 --database-url postgresql+psycopg2://...
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+DEFAULT_MIX = "login=5,create_order=10,list_orders=50,update_order=15,sub_order_status=20"
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for item in text.split(","):
+        name, _, weight = item.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"unknown operation '{name}', expected one of {', '.join(OPERATIONS)}")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+class VirtualUser:
+    """One client session with its own token and random stream."""
+
+    def __init__(self, base_url: str, index: int, seed: int, orders: int, sub_orders: int):
+        import requests
+
+        self.base_url = base_url
+        self.session = requests.Session()
+        self.random = random.Random(seed + index)
+        self.username = f"loadtest{index}"
+        self.password = "load-test-password"
+        self.orders = orders
+        self.sub_orders = sub_orders
+        self.created = 0
+        self.index = index
+
+    def register(self):
+        # Every user registers at once, which can saturate the hashing pool (503)
+        for _ in range(50):
+            response = self.session.post(f"{self.base_url}/register", json={
+                "username": self.username,
+                "email": f"{self.username}@example.com",
+                "password": self.password,
+                "first_name": "Load",
+                "last_name": f"User {self.index}",
+            })
+            if response.status_code != 503:
+                break
+            time.sleep(float(response.headers.get("Retry-After", 1)))
+        self.login()
+
+    def login(self):
+        response = self.session.post(f"{self.base_url}/login",
+                                     json={"username": self.username, "password": self.password})
+        if response.ok:
+            self.session.headers["Authorization"] = f"Bearer {response.json()['access_token']}"
+        return response
+
+    def create_order(self):
+        from common import order_row
+
+        row = order_row(self.random.randrange(1_000_000))
+        row["order_date"] = row["order_date"].isoformat()
+        self.created += 1
+        return self.session.post(f"{self.base_url}/orders/", json=row)
+
+    def list_orders(self):
+        params = {"limit": 50, "skip": self.random.randrange(0, max(self.orders - 50, 1))}
+        if self.random.random() < 0.3:
+            params["status"] = self.random.choice(["Open", "In-Process", "Closed"])
+        return self.session.get(f"{self.base_url}/orders/", params=params)
+
+    def update_order(self):
+        from common import INGREDIENTS
+
+        order_id = self.random.randint(1, self.orders)
+        changes = {"quantity": self.random.randint(1, 1000)}
+        if self.random.random() < 0.5:
+            changes[self.random.choice(INGREDIENTS)] = self.random.choice(["Y", "N"])
+        return self.session.put(f"{self.base_url}/orders/{order_id}", json=changes)
+
+    def sub_order_status(self):
+        sub_order_id = self.random.randint(1, self.sub_orders)
+        status = self.random.choice(["Open", "In-Process", "Closed"])
+        return self.session.put(f"{self.base_url}/sub-orders/{sub_order_id}/status", params={"status": status})
+
+
+OPERATIONS = {
+    "login": VirtualUser.login,
+    "create_order": VirtualUser.create_order,
+    "list_orders": VirtualUser.list_orders,
+    "update_order": VirtualUser.update_order,
+    "sub_order_status": VirtualUser.sub_order_status,
+}
+
+
+def run_user(user: VirtualUser, mix: dict, deadline: float, samples: dict, lock: threading.Lock):
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        name = user.random.choices(names, weights)[0]
+        start = time.perf_counter()
+        try:
+            ok = OPERATIONS[name](user).status_code < 400
+        except Exception:
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        with lock:
+            samples.setdefault(name, []).append((elapsed_ms, ok))
+
+
+def summarize(samples: dict, duration: float) -> dict:
+    from common import percentile
+
+    report = {}
+    for name in sorted(samples):
+        latencies = [ms for ms, _ in samples[name]]
+        report[name] = {
+            "requests": len(latencies),
+            "errors": sum(1 for _, ok in samples[name] if not ok),
+            "throughput_rps": round(len(latencies) / duration, 2),
+            "mean_ms": round(statistics.fmean(latencies), 2),
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "max_ms": round(max(latencies), 2),
+        }
+    return report
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """Describe every operation that got slower or lower-throughput than the baseline."""
+    regressions = []
+    for name, current in report["operations"].items():
+        previous = baseline.get("operations", {}).get(name)
+        if not previous:
+            continue
+        if current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {previous['p95_ms']} ms -> {current['p95_ms']} ms")
+        if current["throughput_rps"] < previous["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {previous['throughput_rps']} -> {current['throughput_rps']} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None,
+                        help="database to seed and serve (default: a temporary SQLite file; tables are recreated)")
+    parser.add_argument("--orders", type=int, default=2000, help="orders seeded before the run")
+    parser.add_argument("--users", type=int, default=16, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds of load after warm-up")
+    parser.add_argument("--mix", type=parse_mix, default=None, help=f"operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1234, help="random seed for the operation sequence")
+    parser.add_argument("--bcrypt-rounds", type=int, default=None, help="override BCRYPT_ROUNDS for the run")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed regression vs the baseline (0.2 = 20%%)")
+    args = parser.parse_args()
+    mix = args.mix or parse_mix(DEFAULT_MIX)
+
+    # The backend builds its engine at import time, so the database has to be
+    # chosen before anything imports it (common.py included)
+    if args.bcrypt_rounds is not None:
+        os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    scratch = None
+    database_url = args.database_url
+    if database_url is None:
+        scratch = tempfile.NamedTemporaryFile(suffix=".db", delete=False)
+        scratch.close()
+        database_url = f"sqlite:///{scratch.name}"
+    os.environ["DATABASE_URL"] = database_url
+    os.environ.pop("ASYNC_DATABASE_URL", None)
+
+    from sqlalchemy import func, select
+    from common import make_engine, seed_orders
+    from backend import models
+
+    try:
+        engine, _ = make_engine(database_url)
+        seed_orders(engine, args.orders)
+        with engine.connect() as conn:
+            sub_orders = conn.execute(select(func.max(models.SubOrder.sub_order_id))).scalar() or 1
+        engine.dispose()
+
+        import uvicorn
+        from common import free_port
+        from backend.main import app
+        from config.database import DATABASE_MODE, DB_POOL_SIZE
+
+        port = free_port()
+        server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.05)
+        base_url = f"http://127.0.0.1:{port}"
+
+        try:
+            users = [VirtualUser(base_url, i, args.seed, args.orders, sub_orders) for i in range(args.users)]
+            with ThreadPoolExecutor(max_workers=args.users) as pool:
+                list(pool.map(VirtualUser.register, users))
+
+            samples, lock = {}, threading.Lock()
+            started = time.perf_counter()
+            deadline = started + args.duration
+            with ThreadPoolExecutor(max_workers=args.users) as pool:
+                for user in users:
+                    pool.submit(run_user, user, mix, deadline, samples, lock)
+            elapsed = time.perf_counter() - started
+        finally:
+            server.should_exit = True
+            thread.join()
+    finally:
+        if scratch is not None:
+            from common import remove_database_files
+            remove_database_files(scratch.name)
+
+    operations = summarize(samples, elapsed)
+    total = sum(op["requests"] for op in operations.values())
+    report = {
+        "run": {
+            "timestamp": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "database": database_url.split(":", 1)[0],
+            "database_mode": DATABASE_MODE,
+            "pool_size": DB_POOL_SIZE,
+            "orders": args.orders,
+            "users": args.users,
+            "duration_s": round(elapsed, 2),
+            "mix": mix,
+            "seed": args.seed,
+        },
+        "total": {
+            "requests": total,
+            "errors": sum(op["errors"] for op in operations.values()),
+            "throughput_rps": round(total / elapsed, 2),
+        },
+        "operations": operations,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
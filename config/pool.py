@@ -0,0 +1,87 @@
+import threading
+import time
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Connection pool telemetry: checkout counts and the time callers spend
+# waiting for a pooled connection, reported alongside the pool's own status.
+
+class PoolTelemetry:
+    """Thread-safe counters for one engine's connection pool."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.connections_opened = 0
+        self.connections_invalidated = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.checkout_timeouts += 1
+
+    def record(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def attach(self, pool):
+        """Count checkouts, new connections and invalidations on a pool."""
+        event.listen(pool, "checkout", lambda *args: self.record("checkouts"))
+        event.listen(pool, "connect", lambda *args: self.record("connections_opened"))
+        event.listen(pool, "invalidate", lambda *args: self.record("connections_invalidated"))
+        pool._telemetry = self
+
+    def snapshot(self, pool) -> dict:
+        """Current pool status plus the counters collected so far."""
+        with self._lock:
+            stats = {
+                "pool_class": type(pool).__name__,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "connections_opened": self.connections_opened,
+                "connections_invalidated": self.connections_invalidated,
+                "wait_ms_total": round(self.wait_seconds_total * 1000, 2),
+                "wait_ms_max": round(self.wait_seconds_max * 1000, 2),
+                "wait_ms_avg": round(self.wait_seconds_total * 1000 / self.checkouts, 3) if self.checkouts else 0.0,
+            }
+        # NullPool and friends keep no connections, so they have no status
+        if isinstance(pool, QueuePool):
+            stats.update(
+                size=pool.size(),
+                checked_out=pool.checkedout(),
+                checked_in=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+                max_overflow=pool._max_overflow,
+                timeout_seconds=pool.timeout(),
+            )
+        return stats
+
+class _TimedCheckoutMixin:
+    """Measures how long each checkout waits on the pool queue."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            self._telemetry.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        self._telemetry.record_wait(time.perf_counter() - start)
+        return record
+
+    def recreate(self):
+        # Event listeners carry over to the new pool; the counters must too
+        pool = super().recreate()
+        pool._telemetry = self._telemetry
+        return pool
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
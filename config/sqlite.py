@@ -0,0 +1,97 @@
+import threading
+import time
+from typing import Optional
+from sqlalchemy import event
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows; writers then queue per process only
+    fcntl = None
+
+# Embedded SQLite support: pragmas applied to every new connection, and a
+# write lock that queues write transactions instead of letting them collide.
+#
+# The driver only opens a transaction (a deferred BEGIN) right before the
+# first INSERT/UPDATE/DELETE, so reads never hold a snapshot that a later
+# write would have to upgrade - in WAL mode that upgrade fails at once with
+# "database is locked". What is left is writers waiting for each other:
+# SQLite's busy handler polls with sleeps of up to 100ms and gives up after
+# busy_timeout. WriteLock hands the database to the next writer as soon as
+# the previous one commits, across threads and uvicorn worker processes.
+
+class WriteLock:
+    """Serializes write transactions between threads, and between processes
+    through flock() on a file next to the database."""
+
+    def __init__(self, path: Optional[str], timeout: float):
+        self._thread_lock = threading.Lock()
+        self._path = path
+        self._file = None
+        self.timeout = timeout
+
+    def acquire(self) -> bool:
+        deadline = time.monotonic() + self.timeout
+        if not self._thread_lock.acquire(timeout=self.timeout):
+            return False
+        if fcntl is None or not self._path:
+            return True
+        if self._file is None:
+            self._file = open(self._path, "a")
+        # flock() has no timeout, so poll it; a blocking LOCK_EX would wait
+        # for another process forever while holding the thread lock
+        delay = 0.001
+        while True:
+            try:
+                fcntl.flock(self._file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                return True
+            except BlockingIOError:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._thread_lock.release()
+                    return False
+                time.sleep(min(delay, remaining))
+                delay = min(delay * 2, 0.02)
+
+    def release(self):
+        if self._file is not None:
+            fcntl.flock(self._file, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+def configure_sqlite(engine, pragmas: dict, serialize_writes: bool = True):
+    """Apply `pragmas` to new connections and optionally queue writers on a WriteLock.
+
+    serialize_writes must be False for asyncio engines, whose statements all
+    run on the event loop thread.
+    """
+
+    @event.listens_for(engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    if not serialize_writes:
+        return
+
+    database = engine.url.database
+    lock_path = f"{database}-writelock" if database and database != ":memory:" else None
+    write_lock = WriteLock(lock_path, pragmas.get("busy_timeout", 5000) / 1000)
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def acquire(conn, cursor, statement, parameters, context, executemany):
+        if context is None or conn.info.get("sqlite_write_lock"):
+            return
+        if context.isinsert or context.isupdate or context.isdelete:
+            # On timeout carry on and leave the wait to busy_timeout
+            conn.info["sqlite_write_lock"] = write_lock.acquire()
+
+    @event.listens_for(engine, "commit")
+    @event.listens_for(engine, "rollback")
+    def release(conn):
+        if conn.info.pop("sqlite_write_lock", False):
+            write_lock.release()
+
+def read_pragmas(connection, names) -> dict:
+    """Current values of the given pragmas on a SQLAlchemy connection."""
+    return {name: connection.exec_driver_sql(f"PRAGMA {name}").scalar() for name in names}
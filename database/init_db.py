@@ -1,9 +1,17 @@
-import psycopg2
-from psycopg2 import Error
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import os
+import sys
 from dotenv import load_dotenv
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+try:
+    import psycopg2
+    from psycopg2 import Error
+    from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+except ImportError:  # only needed for PostgreSQL; SQLite deployments run without it
+    psycopg2 = None
+    Error = Exception
+
 load_dotenv()
 
 def create_database():
@@ -69,6 +77,22 @@ def create_sample_data():
     except Error as e:
         print(f"Error while connecting to PostgreSQL: {e}")
 
+def create_sqlite_database():
+    """Create the tables in the SQLite file named by DATABASE_URL and show its pragmas"""
+    from config.database import SQLITE_PRAGMAS, engine
+    from config.sqlite import read_pragmas
+    from backend import models, search
+
+    models.Base.metadata.create_all(bind=engine)
+    search.install_sqlite(engine)
+    print(f"SQLite database '{engine.url.database}' is ready")
+    with engine.connect() as conn:
+        for name, value in read_pragmas(conn, SQLITE_PRAGMAS).items():
+            print(f"  {name} = {value}")
+
 if __name__ == "__main__":
-    create_database()
-    create_sample_data()
\ No newline at end of file
+    if os.getenv("DATABASE_URL", "").startswith("sqlite"):
+        create_sqlite_database()
+    else:
+        create_database()
+        create_sample_data()
\ No newline at end of file
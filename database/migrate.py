@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Bring an existing database up to date with backend/models.py.
+
+Base.metadata.create_all() (run by the API on startup) only creates missing
+tables, so databases created before a column or index was added to the
+models never receive it. This script adds any nullable column and creates
+any index declared on the models that the database does not have yet, and
+rebuilds an index whose columns have changed since it was created. It is
+idempotent and safe to re-run.
+
+On PostgreSQL the indexes are built with CREATE INDEX CONCURRENTLY so the
+orders tables stay writable while a large index is being built. The search
+indexes behind GET /search are set up too: pg_trgm, btree_gist and the GiST
+indexes on PostgreSQL, the FTS5 table and its triggers on SQLite.
+
+Usage:
+    python database/migrate.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateColumn, CreateIndex, DropIndex
+
+from config.database import engine
+from backend import models, search
+
+def add_missing_columns(bind=engine):
+    """Add nullable columns declared on the models that are missing from the database."""
+    inspector = inspect(bind)
+    preparer = bind.dialect.identifier_preparer
+    added = []
+
+    for table in models.Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            if not column.nullable:
+                print(f"⚠️  Skipping NOT NULL column {table.name}.{column.name}; add it by hand")
+                continue
+            print(f"📋 Adding column {column.name} to {table.name}")
+            spec = str(CreateColumn(column).compile(dialect=bind.dialect))
+            with bind.begin() as conn:
+                conn.execute(text(f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN {spec}"))
+            added.append(f"{table.name}.{column.name}")
+    return added
+
+def create_missing_indexes(bind=engine):
+    """Create indexes declared on the models that are missing from the database or out of date."""
+    inspector = inspect(bind)
+    concurrently = bind.dialect.name == "postgresql"
+    created = []
+
+    for table in models.Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"]: index["column_names"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda ix: ix.name):
+            columns = [column.name for column in index.columns]
+            if existing.get(index.name) == columns:
+                continue
+            statements = []
+            if index.name in existing:
+                # e.g. a pagination tie-breaker appended to the index
+                print(f"📋 Rebuilding index {index.name} on {table.name} as ({', '.join(columns)})")
+                statements.append(str(DropIndex(index).compile(dialect=bind.dialect)))
+            else:
+                print(f"📋 Creating index {index.name} on {table.name}")
+            statements.append(str(CreateIndex(index).compile(dialect=bind.dialect)))
+            if concurrently:
+                # CONCURRENTLY cannot run inside a transaction block
+                statements = [
+                    ddl.replace("DROP INDEX", "DROP INDEX CONCURRENTLY", 1)
+                    .replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+                    for ddl in statements
+                ]
+                with bind.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                    for ddl in statements:
+                        conn.execute(text(ddl))
+            else:
+                with bind.begin() as conn:
+                    for ddl in statements:
+                        conn.execute(text(ddl))
+            created.append(index.name)
+    return created
+
+def main():
+    print("🏗️  Migrating Pharma Order Management Database...")
+    models.Base.metadata.create_all(bind=engine)
+    added = add_missing_columns()
+    created = create_missing_indexes()
+    # Trigram indexes (PostgreSQL) or the FTS5 table (SQLite) behind /search
+    if engine.dialect.name == "postgresql":
+        created += search.install_postgresql(engine)
+    elif engine.dialect.name == "sqlite" and search.install_sqlite(engine):
+        print("✅ Built the search index")
+    if added:
+        print(f"✅ Added {len(added)} column(s)")
+    if created:
+        print(f"✅ Created {len(created)} index(es)")
+    if not added and not created:
+        print("✅ Database is up to date")
+
+if __name__ == "__main__":
+    main()
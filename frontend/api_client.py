@@ -0,0 +1,86 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# HTTP client for the backend API. One requests.Session per process keeps
+# connections to the API alive between calls and Streamlit reruns, every call
+# gets a (connect, read) timeout, and idempotent calls are retried a bounded
+# number of times when connecting fails or the API answers 502/503/504.
+# Independent calls can be sent concurrently with send_all().
+
+API_CONNECT_TIMEOUT = float(os.getenv("API_CONNECT_TIMEOUT", "3.05"))
+API_READ_TIMEOUT = float(os.getenv("API_READ_TIMEOUT", "30"))
+API_RETRIES = int(os.getenv("API_RETRIES", "2"))
+API_RETRY_BACKOFF = float(os.getenv("API_RETRY_BACKOFF", "0.25"))
+# Keep-alive connections per process, also the number of concurrent calls
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "10"))
+
+DEFAULT_TIMEOUT = (API_CONNECT_TIMEOUT, API_READ_TIMEOUT)
+
+_session = None
+_executor = None
+_lock = threading.Lock()
+
+def create_session() -> requests.Session:
+    retry = Retry(
+        total=API_RETRIES,
+        # A read timeout means the API is slow, not gone: retrying would only
+        # multiply the wait. False re-raises it as requests' ReadTimeout
+        read=False,
+        backoff_factor=API_RETRY_BACKOFF,
+        status_forcelist=(502, 503, 504),
+        # GET, PUT and DELETE only: a retried POST could create an order twice
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=API_POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # The session is shared by every user of this process; the API
+    # authenticates with bearer tokens, so no cookie may be kept between them
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    return session
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session = create_session()
+    return _session
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=API_POOL_SIZE, thread_name_prefix="api")
+    return _executor
+
+def send(method: str, url: str, timeout=None, **kwargs) -> requests.Response:
+    """Send one request through the pooled session."""
+    return get_session().request(method, url, timeout=timeout or DEFAULT_TIMEOUT, **kwargs)
+
+def _send_or_error(call: dict):
+    try:
+        return send(**call)
+    except requests.exceptions.RequestException as e:
+        return e
+
+def send_all(calls: list) -> list:
+    """Send independent requests concurrently.
+
+    Each call is a dict of send() arguments. Returns a Response or the
+    RequestException it raised for every call, in order; the total time is
+    that of the slowest call.
+    """
+    if len(calls) <= 1:
+        return [_send_or_error(call) for call in calls]
+    return list(_get_executor().map(_send_or_error, calls))
@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+import api_client
+
+# Client for the backend's GET /changes server-sent events. Each browser
+# session keeps one feed: a background thread holds the stream open and
+# queues the events, and the Streamlit script drains them on its next run to
+# patch its cached API responses instead of refetching whole lists. While the
+# feed is connected and the backend says it carries changes from every worker
+# (its "hello" event), the cache needs no expiry; after a disconnect the feed
+# resumes with Last-Event-ID and the backend replays what was missed (or
+# sends a reset).
+
+# Off turns the feed off; the cache then falls back to its TTL
+API_CHANGE_FEED = os.getenv("API_CHANGE_FEED", "on").strip().lower() not in ("0", "false", "no", "off")
+# The backend sends a keep-alive every 15 s, so a silent stream is dead
+CHANGE_FEED_READ_TIMEOUT = float(os.getenv("CHANGE_FEED_READ_TIMEOUT", "45"))
+CHANGE_FEED_RECONNECT_SECONDS = float(os.getenv("CHANGE_FEED_RECONNECT_SECONDS", "2"))
+# Streamlit does not say when a browser session ends; a feed whose session has
+# not run for this long closes its stream
+CHANGE_FEED_IDLE_SECONDS = float(os.getenv("CHANGE_FEED_IDLE_SECONDS", "600"))
+
+class ChangeFeed:
+    """Background listener for one session's GET /changes stream."""
+
+    def __init__(self, url: str, headers: dict):
+        self.url = url
+        self.headers = headers
+        self.connected = threading.Event()
+        # Set while the stream carries changes made through any backend worker
+        self.complete = threading.Event()
+        self.last_event_id = None
+        self._events = deque()
+        self._last_used = time.monotonic()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="change-feed", daemon=True)
+        self._thread.start()
+
+    @property
+    def alive(self) -> bool:
+        return self._thread.is_alive()
+
+    def drain(self) -> list:
+        """The events received since the last call, oldest first."""
+        self._last_used = time.monotonic()
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+    def stop(self):
+        self._stop.set()
+
+    def _idle(self) -> bool:
+        return self._stop.is_set() or time.monotonic() - self._last_used > CHANGE_FEED_IDLE_SECONDS
+
+    def _run(self):
+        while not self._idle():
+            try:
+                self._listen()
+            except (requests.exceptions.RequestException, ValueError):
+                pass
+            self.connected.clear()
+            self.complete.clear()
+            self._stop.wait(CHANGE_FEED_RECONNECT_SECONDS)
+
+    def _listen(self):
+        headers = dict(self.headers, Accept="text/event-stream")
+        if self.last_event_id:
+            headers["Last-Event-ID"] = self.last_event_id
+        timeout = (api_client.API_CONNECT_TIMEOUT, CHANGE_FEED_READ_TIMEOUT)
+        # A plain request rather than the pooled session: the stream holds
+        # its connection for as long as it is open
+        with requests.get(self.url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code != 200:
+                # Expired token or no feed on this backend: the TTL applies again
+                self._stop.set()
+                return
+            self.connected.set()
+            if not self.last_event_id:
+                # Responses cached before the stream opened may have missed changes
+                self._events.append({"type": "reset"})
+            message = {}
+            for line in response.iter_lines(decode_unicode=True):
+                if self._idle():
+                    return
+                if line:
+                    if not line.startswith(":"):
+                        field, _, value = line.partition(":")
+                        message[field] = value[1:] if value.startswith(" ") else value
+                    continue
+                # A blank line ends a message
+                if message.get("event") == "hello":
+                    if json.loads(message["data"]).get("scope") == "all_workers":
+                        self.complete.set()
+                elif "data" in message:
+                    self._events.append(dict(json.loads(message["data"]), type=message.get("event")))
+                if "id" in message:
+                    self.last_event_id = message["id"]
+                message = {}
@@ -4,6 +4,8 @@ import pandas as pd
 from typing import Dict, Any
 import json
 from datetime import datetime, time
+import api_client
+import change_feed
 from auth_utils import is_authenticated, get_auth_headers, verify_token, get_current_user
 from login_page import show_login_page, show_user_info
 
@@ -17,33 +19,241 @@ st.set_page_config(
     layout="wide"
 )
 
-def make_api_request(method: str, endpoint: str, data: Dict[Any, Any] = None):
-    """Make API request to backend with authentication"""
-    url = f"{API_BASE_URL}{endpoint}"
+# GET responses are cached per browser session (st.session_state is not
+# shared between users) so that widget interactions, which rerun the whole
+# script, do not refetch unchanged data. Entries expire after
+# API_CACHE_TTL_SECONDS; successful POST/PUT/DELETE calls drop the entries
+# of every resource they can change. While the session's change feed
+# (GET /changes) is connected and carries every worker's changes, entries do
+# not expire: apply_changes() patches or drops them as other users' changes
+# arrive.
+API_CACHE_TTL_SECONDS = 30
+
+# First path segment of a mutated endpoint -> cached endpoints it affects.
+# Sub-orders are nested in order responses and both feed /stats.
+CACHE_INVALIDATES = {
+    "orders": ("/orders", "/sub-orders", "/stats"),
+    "sub-orders": ("/sub-orders", "/orders", "/stats"),
+}
+
+VIEW_ORDERS_PAGE_SIZES = [10, 25, 50, 100]
+# Search results are paged by offset up to the backend's search.MAX_SKIP
+SEARCH_MAX_SKIP = 1000
+# Sparse fieldset for pages that only need order ids
+ORDER_ID_FIELDS = {"fields": "order_id"}
+INGREDIENT_FIELDS = ('carton', 'label', 'rm', 'sterios', 'bottles', 'm_cups', 'caps', 'shippers')
+
+# Cached list pages with only these parameters are patched in place when their
+# rows change; with filters, another sort order or a search a change can move
+# rows between pages, so those pages are dropped instead
+PATCHABLE_LIST_PARAMS = {"skip", "limit", "cursor", "fields", "include"}
+# Changed orders are refetched with one POST /orders/batch (the backend's
+# ORDER_BATCH_MAX_IDS); beyond that the cache is simply cleared
+CHANGE_FEED_MAX_REFETCH = 500
+
+def _api_cache() -> dict:
+    if "api_cache" not in st.session_state:
+        st.session_state.api_cache = {}
+    return st.session_state.api_cache
+
+def _cache_key(endpoint: str, params: Dict[str, Any], headers: Dict[str, str]):
+    # The token is part of the key so a different login never sees these entries
+    return (headers.get("Authorization"), endpoint, tuple(sorted((params or {}).items())))
+
+def invalidate_api_cache(endpoint: str = None):
+    """Drop cached GETs affected by a change to `endpoint`, or all of them."""
+    cache = _api_cache()
+    if endpoint is None:
+        cache.clear()
+        return
+    resource = endpoint.strip("/").split("/", 1)[0]
+    prefixes = CACHE_INVALIDATES.get(resource, (f"/{resource}",))
+    for key in [key for key in cache if key[1].startswith(prefixes)]:
+        del cache[key]
+
+def _change_feed():
+    """The session's change feed, restarted when the login changes."""
     headers = get_auth_headers()
-    
+    feed = st.session_state.get("change_feed")
+    if feed is not None and (feed.headers != headers or not feed.alive):
+        feed.stop()
+        feed = st.session_state.change_feed = None
+    if feed is None and change_feed.API_CHANGE_FEED:
+        feed = st.session_state.change_feed = change_feed.ChangeFeed(f"{API_BASE_URL}/changes", headers)
+    return feed
+
+def _feed_complete() -> bool:
+    # A feed with one worker's changes (CHANGE_FEED_TRANSPORT=local) misses
+    # changes made through the others, so the TTL still applies
+    feed = st.session_state.get("change_feed")
+    return feed is not None and feed.complete.is_set()
+
+def _fetch_orders(order_ids) -> dict:
+    """Current orders with their sub-orders, by id; deleted ones are absent."""
+    response = api_client.send("POST", f"{API_BASE_URL}/orders/batch",
+                               headers=get_auth_headers(), json={"ids": sorted(order_ids)})
+    response.raise_for_status()
+    return {order["order_id"]: order for order in response.json()["orders"]}
+
+def _project(fresh: dict, cached: dict) -> dict:
+    # Cached items may be sparse fieldsets; keep their shape
+    return {field: fresh.get(field) for field in cached}
+
+def _patched(endpoint: str, params: dict, data, changed_orders: set, orders: dict, sub_orders: dict,
+             orders_changed: bool, orders_created: bool):
+    """`data` updated for the changes, unchanged data as is, or None to drop the entry."""
+    parts = endpoint.strip("/").split("/")
+    if parts[0] == "stats":
+        return None
+    if parts == ["orders"]:
+        if orders_created or not set(params) <= PATCHABLE_LIST_PARAMS:
+            return None
+        return [
+            _project(orders[item["order_id"]], item) if item["order_id"] in orders else item
+            for item in data
+            if item["order_id"] not in changed_orders or item["order_id"] in orders
+        ]
+    if parts == ["sub-orders"]:
+        # Order changes can add and remove sub-orders anywhere in the list
+        if orders_changed or not set(params) <= PATCHABLE_LIST_PARAMS:
+            return None
+        return [
+            _project(sub_orders[item["sub_order_id"]], item) if item["sub_order_id"] in sub_orders else item
+            for item in data
+        ]
+    if parts == ["orders", "companies"]:
+        return None if orders_changed else data
+    if parts[0] == "orders" and parts[1].isdigit():
+        order_id = int(parts[1])
+        if order_id not in changed_orders:
+            return data
+        if order_id not in orders:
+            return None
+        if parts[2:] == ["sub-orders"]:
+            return orders[order_id]["sub_orders"]
+        return _project(orders[order_id], data)
+    if parts[0] == "sub-orders" and parts[1].isdigit():
+        if data["order_id"] not in changed_orders:
+            return data
+        sub_order_id = int(parts[1])
+        return _project(sub_orders[sub_order_id], data) if sub_order_id in sub_orders else None
+    if parts[0] in ("orders", "search"):
+        return None
+    return data
+
+def apply_changes():
+    """Bring cached API responses up to date with the change feed's events."""
+    feed = _change_feed()
+    events = feed.drain() if feed is not None else []
+    if not events:
+        return
+    if any(event["type"] == "reset" for event in events):
+        invalidate_api_cache()
+        return
+    changed_orders = set()
+    orders_changed = orders_created = False
+    for event in events:
+        if event["entity"] == "order":
+            changed_orders.update(event["ids"])
+            orders_changed = True
+            orders_created = orders_created or event["action"] == "created"
+        else:
+            changed_orders.update(event["order_ids"])
+    if len(changed_orders) > CHANGE_FEED_MAX_REFETCH:
+        invalidate_api_cache()
+        return
     try:
-        if method == "GET":
-            response = requests.get(url, headers=headers)
-        elif method == "POST":
-            response = requests.post(url, json=data, headers=headers)
-        elif method == "PUT":
-            response = requests.put(url, json=data, headers=headers)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=headers)
-        
+        orders = _fetch_orders(changed_orders) if changed_orders else {}
+    except (requests.exceptions.RequestException, ValueError):
+        invalidate_api_cache()
+        return
+    sub_orders = {
+        sub_order["sub_order_id"]: sub_order
+        for order in orders.values()
+        for sub_order in order["sub_orders"]
+    }
+    cache = _api_cache()
+    for key in list(cache):
+        entry = cache[key]
+        data = _patched(key[1], dict(key[2]), entry["data"], changed_orders, orders, sub_orders,
+                        orders_changed, orders_created)
+        if data is None:
+            del cache[key]
+        elif data != entry["data"]:
+            # The stored ETag no longer describes the patched data
+            entry["data"], entry["etag"] = data, None
+
+def _prepare_request(method: str, endpoint: str, data: Dict[Any, Any] = None, params: Dict[str, Any] = None,
+                     timeout=None):
+    """The send() arguments for a call, or its cached result under "data"."""
+    headers = get_auth_headers()
+    request = {"method": method, "endpoint": endpoint, "cache_key": None, "cached": None}
+    if method == "GET":
+        request["cache_key"] = _cache_key(endpoint, params, headers)
+        cached = request["cached"] = _api_cache().get(request["cache_key"])
+        if cached and (cached["expires"] > datetime.now().timestamp() or _feed_complete()):
+            request["data"] = cached["data"]
+            return request
+        if cached and cached.get("etag"):
+            # Expired: revalidate instead of downloading the same data again
+            headers = {**headers, "If-None-Match": cached["etag"]}
+    request["send"] = {"method": method, "url": f"{API_BASE_URL}{endpoint}", "headers": headers,
+                       "params": params, "json": data, "timeout": timeout}
+    return request
+
+def _handle_response(request: dict, response):
+    """Turn a response (or the exception sending it raised) into the call's result."""
+    try:
+        if isinstance(response, Exception):
+            raise response
+        cached = request["cached"]
+        if request["method"] == "GET" and response.status_code == 304:
+            cached["expires"] = datetime.now().timestamp() + API_CACHE_TTL_SECONDS
+            return cached["data"]
         if response.status_code in [200, 201]:
-            return response.json()
+            result = response.json()
+            if request["cache_key"] is not None:
+                _api_cache()[request["cache_key"]] = {
+                    "data": result,
+                    "etag": response.headers.get("ETag"),
+                    "next_cursor": response.headers.get("X-Next-Cursor"),
+                    "expires": datetime.now().timestamp() + API_CACHE_TTL_SECONDS,
+                }
+            else:
+                invalidate_api_cache(request["endpoint"])
+            return result
         else:
             st.error(f"API Error: {response.status_code} - {response.text}")
             return None
     except requests.exceptions.ConnectionError:
         st.error("Cannot connect to backend API. Please ensure the backend server is running.")
         return None
+    except requests.exceptions.Timeout:
+        st.error("The backend API did not respond in time. Please try again.")
+        return None
     except Exception as e:
         st.error(f"Error: {str(e)}")
         return None
 
+def fetch_concurrently(*calls):
+    """Make independent API requests in parallel.
+
+    Each call is a tuple of make_api_request arguments; results come back in
+    the same order. Session state and st.error are only touched from the
+    script thread, the worker threads just send the requests.
+    """
+    prepared = [_prepare_request(*call) for call in calls]
+    pending = [request for request in prepared if "data" not in request]
+    responses = api_client.send_all([request["send"] for request in pending])
+    for request, response in zip(pending, responses):
+        request["data"] = _handle_response(request, response)
+    return [request["data"] for request in prepared]
+
+def make_api_request(method: str, endpoint: str, data: Dict[Any, Any] = None, params: Dict[str, Any] = None,
+                     timeout=None):
+    """Make API request to backend with authentication"""
+    return fetch_concurrently((method, endpoint, data, params, timeout))[0]
+
 def main():
     # Check authentication
     if not is_authenticated():
@@ -58,6 +268,9 @@ def main():
         st.rerun()
         return
     
+    # Patch cached data with what other users changed since the last run
+    apply_changes()
+    
     # Show user info at the top
     show_user_info()
     st.divider()
@@ -74,6 +287,8 @@ def main():
         "Sub-Orders",
         "Update Order Status"
     ])
+    if st.sidebar.button("🔄 Refresh data"):
+        invalidate_api_cache()
     
     if page == "Dashboard":
         show_dashboard()
@@ -91,37 +306,35 @@ def main():
 def show_dashboard():
     st.header("Dashboard")
     
-    # Get orders data
-    orders = make_api_request("GET", "/orders/")
-    sub_orders = make_api_request("GET", "/sub-orders/")
+    # Counts are aggregated by the backend
+    stats = make_api_request("GET", "/stats")
     
-    if orders is not None and sub_orders is not None:
+    if stats is not None:
+        orders_by_status = stats['orders_by_status']
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
-            st.metric("Total Orders", len(orders))
+            st.metric("Total Orders", stats['total_orders'])
         
         with col2:
-            open_orders = len([o for o in orders if o['status'] == 'Open'])
-            st.metric("Open Orders", open_orders)
+            st.metric("Open Orders", orders_by_status.get('Open', 0))
         
         with col3:
-            in_process_orders = len([o for o in orders if o['status'] == 'In-Process'])
-            st.metric("In-Process Orders", in_process_orders)
+            st.metric("In-Process Orders", orders_by_status.get('In-Process', 0))
         
         with col4:
-            st.metric("Total Sub-Orders", len(sub_orders))
+            st.metric("Total Sub-Orders", stats['total_sub_orders'])
         
         # Status distribution
-        if orders:
+        if orders_by_status:
             st.subheader("Order Status Distribution")
-            status_counts = {}
-            for order in orders:
-                status = order['status']
-                status_counts[status] = status_counts.get(status, 0) + 1
-            
-            df_status = pd.DataFrame(list(status_counts.items()), columns=['Status', 'Count'])
+            df_status = pd.DataFrame(list(orders_by_status.items()), columns=['Status', 'Count'])
             st.bar_chart(df_status.set_index('Status'))
+        
+        if stats['sub_orders_by_ingredient']:
+            st.subheader("Sub-Orders by Ingredient")
+            df_ingredients = pd.DataFrame(list(stats['sub_orders_by_ingredient'].items()), columns=['Ingredient', 'Count'])
+            st.bar_chart(df_ingredients.set_index('Ingredient'))
 
 def show_create_order():
     st.header("Create New Order")
@@ -188,44 +401,155 @@ def show_create_order():
             else:
                 st.error("Please fill in all required fields.")
 
-def show_view_orders():
-    st.header("📋 View Orders & Sub-Orders")
+def fetch_page(endpoint: str, params: Dict[str, Any]):
+    """GET one page of a list endpoint: (items, cursor of the next page or None)."""
+    items = make_api_request("GET", endpoint, params=params)
+    entry = _api_cache().get(_cache_key(endpoint, params, get_auth_headers()))
+    return items, entry.get("next_cursor") if entry else None
+
+def show_sub_order_details(sub_orders):
+    """Table and per-sub-order detail blocks for one order's sub-orders."""
+    # Create a table-like display for sub-orders
+    sub_order_data = []
+    for sub_order in sub_orders:
+        sub_order_date = sub_order.get('sub_order_date')
+        sub_order_date_str = pd.to_datetime(sub_order_date).strftime('%Y-%m-%d') if sub_order_date else 'Not set'
+        
+        approved_first = sub_order.get('approved_by_first_name') or ''
+        approved_last = sub_order.get('approved_by_last_name') or ''
+        approved_by = f"{approved_first} {approved_last}".strip() or 'Not set'
+        
+        sub_order_data.append({
+            'Sub-Order ID': sub_order['sub_order_id'],
+            'Ingredient': sub_order['ingredient_type'].title(),
+            'Status': sub_order['status'],
+            'Sub-Order Date': sub_order_date_str,
+            'Vendor Company': sub_order.get('vendor_company') or 'Not set',
+            'Designer': sub_order.get('designer_name') or 'Not set',
+            'Approved By': approved_by,
+            'Sizes': sub_order.get('sizes') or 'Not set'
+        })
     
-    # Fetch orders and sub-orders
-    orders = make_api_request("GET", "/orders/")
-    sub_orders = make_api_request("GET", "/sub-orders/")
+    sub_df = pd.DataFrame(sub_order_data)
+    st.dataframe(sub_df, use_container_width=True, hide_index=True)
     
-    if orders:
-        # Group sub-orders by order_id for easy lookup
-        sub_orders_by_order = {}
-        if sub_orders:
-            for sub_order in sub_orders:
-                order_id = sub_order['order_id']
-                if order_id not in sub_orders_by_order:
-                    sub_orders_by_order[order_id] = []
-                sub_orders_by_order[order_id].append(sub_order)
+    # Show detailed view for each sub-order in a more compact format
+    st.write("**📋 Sub-Order Details:**")
+    for sub_order in sub_orders:
+        st.markdown(f"**🔧 Sub-Order #{sub_order['sub_order_id']} - {sub_order['ingredient_type'].title()}**")
         
-        # Filter options
-        col1, col2 = st.columns(2)
+        col1, col2, col3 = st.columns(3)
         with col1:
-            status_filter = st.selectbox("Filter by Status", ["All", "Open", "In-Process", "Closed"])
+            st.write(f"• **Status:** {sub_order['status']}")
+            st.write(f"• **Vendor:** {sub_order.get('vendor_company') or 'Not specified'}")
+            st.write(f"• **Product:** {sub_order.get('product_name') or 'Not specified'}")
+        
         with col2:
-            company_filter = st.selectbox("Filter by Company", ["All"] + list(set([order['company_name'] for order in orders])))
+            st.write(f"• **Designer:** {sub_order.get('designer_name') or 'Not specified'}")
+            st.write(f"• **Sizes:** {sub_order.get('sizes') or 'Not specified'}")
+            
+            approved_first = sub_order.get('approved_by_first_name') or ''
+            approved_last = sub_order.get('approved_by_last_name') or ''
+            approved_by = f"{approved_first} {approved_last}".strip()
+            st.write(f"• **Approved By:** {approved_by or 'Not specified'}")
         
-        # Apply filters
-        filtered_orders = orders.copy()
-        if status_filter != "All":
-            filtered_orders = [order for order in filtered_orders if order['status'] == status_filter]
-        if company_filter != "All":
-            filtered_orders = [order for order in filtered_orders if order['company_name'] == company_filter]
+        with col3:
+            main_order_date = sub_order.get('main_order_date')
+            if main_order_date:
+                st.write(f"• **Main Order Date:** {pd.to_datetime(main_order_date).strftime('%Y-%m-%d')}")
+            else:
+                st.write("• **Main Order Date:** Not specified")
+            
+            sub_order_date = sub_order.get('sub_order_date')
+            if sub_order_date:
+                st.write(f"• **Sub-Order Date:** {pd.to_datetime(sub_order_date).strftime('%Y-%m-%d')}")
+            else:
+                st.write("• **Sub-Order Date:** Not specified")
+            
+            approved_date = sub_order.get('approved_date')
+            if approved_date:
+                st.write(f"• **Approved Date:** {pd.to_datetime(approved_date).strftime('%Y-%m-%d')}")
+            else:
+                st.write("• **Approved Date:** Not specified")
         
-        # Display each order with its sub-orders
-        for order in filtered_orders:
+        if sub_order.get('remarks'):
+            st.write(f"• **Remarks:** {sub_order['remarks']}")
+        
+        st.markdown("---")
+
+def _next_orders_page(next_cursor):
+    st.session_state.view_orders_cursors.append(next_cursor)
+
+def _previous_orders_page():
+    st.session_state.view_orders_cursors.pop()
+
+def show_view_orders():
+    st.header("📋 View Orders & Sub-Orders")
+    
+    search_query = st.text_input("🔍 Search", placeholder="Company, product, molecule or vendor (3+ characters)").strip()
+    
+    # Filter options (evaluated by the backend)
+    col1, col2, col3, col4, col5 = st.columns(5)
+    with col1:
+        status_filter = st.selectbox("Filter by Status", ["All", "Open", "In-Process", "Closed"])
+    with col2:
+        companies = make_api_request("GET", "/orders/companies") or []
+        company_filter = st.selectbox("Filter by Company", ["All"] + companies)
+    with col3:
+        date_from = st.date_input("Order Date From", value=None)
+    with col4:
+        date_to = st.date_input("Order Date To", value=None)
+    with col5:
+        page_size = st.selectbox("Orders per page", VIEW_ORDERS_PAGE_SIZES, index=1)
+    
+    # Sub-orders are fetched per order when shown, not nested in the page
+    params = {"limit": page_size, "include": ""}
+    if status_filter != "All":
+        params["status"] = status_filter
+    if company_filter != "All":
+        params["company_name"] = company_filter
+    if date_from:
+        params["order_date_from"] = datetime.combine(date_from, time(0, 0, 0)).isoformat()
+    if date_to:
+        params["order_date_to"] = datetime.combine(date_to, time(23, 59, 59)).isoformat()
+    
+    # A search is ranked by relevance on the backend and replaces the filters
+    if search_query:
+        st.caption("Showing the best matches for the search; filters are not applied.")
+        params = {"q": search_query, "limit": page_size, "include": ""}
+    
+    # Pages are fetched with the backend's keyset cursors; cursors[i] starts
+    # page i + 1. Changing a filter or the page size starts over at page 1.
+    # Search results are ranked, so their "cursors" are offsets instead.
+    paging_key = tuple(sorted(params.items()))
+    if st.session_state.get("view_orders_paging_key") != paging_key:
+        st.session_state.view_orders_paging_key = paging_key
+        st.session_state.view_orders_cursors = [None]
+    cursors = st.session_state.view_orders_cursors
+    if search_query:
+        skip = cursors[-1] or 0
+        orders = make_api_request("GET", "/search", params=dict(params, skip=skip))
+        next_skip = skip + page_size
+        next_cursor = next_skip if orders and len(orders) == page_size and next_skip <= SEARCH_MAX_SKIP else None
+    else:
+        page_params = dict(params, cursor=cursors[-1]) if cursors[-1] else params
+        orders, next_cursor = fetch_page("/orders/", page_params)
+    
+    if orders:
+        first = (len(cursors) - 1) * page_size + 1
+        st.caption(f"Page {len(cursors)} · orders {first}–{first + len(orders) - 1}")
+        
+        # Only the orders on this page are rendered, and sub-orders only for
+        # the orders whose "Show sub-orders" box is ticked
+        for order in orders:
             order_id = order['order_id']
-            sub_order_count = len(sub_orders_by_order.get(order_id, []))
+            # Orders have one sub-order per ingredient marked 'Y'
+            sub_order_count = sum(order[field] == 'Y' for field in INGREDIENT_FIELDS)
+            show_key = f"view_order_sub_orders_{order_id}"
             
             # Main order section
-            with st.expander(f"📦 Order #{order_id} - {order['company_name']} - {order['product_name']} ({sub_order_count} sub-orders)", expanded=False):
+            with st.expander(f"📦 Order #{order_id} - {order['company_name']} - {order['product_name']} ({sub_order_count} sub-orders)",
+                             expanded=st.session_state.get(show_key, False)):
                 col1, col2 = st.columns(2)
                 
                 with col1:
@@ -261,104 +585,45 @@ def show_view_orders():
                     st.write(f"• Shippers: {order['shippers']}")
                 
                 # Sub-orders section
-                if order_id in sub_orders_by_order and sub_orders_by_order[order_id]:
-                    st.write("**Sub-Orders:**")
-                    
-                    # Create a table-like display for sub-orders
-                    sub_order_data = []
-                    for sub_order in sub_orders_by_order[order_id]:
-                        sub_order_date = sub_order.get('sub_order_date')
-                        sub_order_date_str = pd.to_datetime(sub_order_date).strftime('%Y-%m-%d') if sub_order_date else 'Not set'
-                        
-                        approved_first = sub_order.get('approved_by_first_name') or ''
-                        approved_last = sub_order.get('approved_by_last_name') or ''
-                        approved_by = f"{approved_first} {approved_last}".strip() or 'Not set'
-                        
-                        sub_order_data.append({
-                            'Sub-Order ID': sub_order['sub_order_id'],
-                            'Ingredient': sub_order['ingredient_type'].title(),
-                            'Status': sub_order['status'],
-                            'Sub-Order Date': sub_order_date_str,
-                            'Vendor Company': sub_order.get('vendor_company') or 'Not set',
-                            'Designer': sub_order.get('designer_name') or 'Not set',
-                            'Approved By': approved_by,
-                            'Sizes': sub_order.get('sizes') or 'Not set'
-                        })
-                    
-                    sub_df = pd.DataFrame(sub_order_data)
-                    st.dataframe(sub_df, use_container_width=True, hide_index=True)
-                    
-                    # Show detailed view for each sub-order in a more compact format
-                    st.write("**📋 Sub-Order Details:**")
-                    for sub_order in sub_orders_by_order[order_id]:
-                        st.markdown(f"**🔧 Sub-Order #{sub_order['sub_order_id']} - {sub_order['ingredient_type'].title()}**")
-                        
-                        col1, col2, col3 = st.columns(3)
-                        with col1:
-                            st.write(f"• **Status:** {sub_order['status']}")
-                            st.write(f"• **Vendor:** {sub_order.get('vendor_company') or 'Not specified'}")
-                            st.write(f"• **Product:** {sub_order.get('product_name') or 'Not specified'}")
-                        
-                        with col2:
-                            st.write(f"• **Designer:** {sub_order.get('designer_name') or 'Not specified'}")
-                            st.write(f"• **Sizes:** {sub_order.get('sizes') or 'Not specified'}")
-                            
-                            approved_first = sub_order.get('approved_by_first_name') or ''
-                            approved_last = sub_order.get('approved_by_last_name') or ''
-                            approved_by = f"{approved_first} {approved_last}".strip()
-                            st.write(f"• **Approved By:** {approved_by or 'Not specified'}")
-                        
-                        with col3:
-                            main_order_date = sub_order.get('main_order_date')
-                            if main_order_date:
-                                st.write(f"• **Main Order Date:** {pd.to_datetime(main_order_date).strftime('%Y-%m-%d')}")
-                            else:
-                                st.write("• **Main Order Date:** Not specified")
-                            
-                            sub_order_date = sub_order.get('sub_order_date')
-                            if sub_order_date:
-                                st.write(f"• **Sub-Order Date:** {pd.to_datetime(sub_order_date).strftime('%Y-%m-%d')}")
-                            else:
-                                st.write("• **Sub-Order Date:** Not specified")
-                            
-                            approved_date = sub_order.get('approved_date')
-                            if approved_date:
-                                st.write(f"• **Approved Date:** {pd.to_datetime(approved_date).strftime('%Y-%m-%d')}")
-                            else:
-                                st.write("• **Approved Date:** Not specified")
-                        
-                        if sub_order.get('remarks'):
-                            st.write(f"• **Remarks:** {sub_order['remarks']}")
-                        
-                        st.markdown("---")
-                else:
+                if not sub_order_count:
                     st.info("No sub-orders for this order.")
-    else:
+                elif st.checkbox("Show sub-orders", key=show_key):
+                    sub_orders = make_api_request("GET", f"/orders/{order_id}/sub-orders/")
+                    if sub_orders:
+                        st.write("**Sub-Orders:**")
+                        show_sub_order_details(sub_orders)
+        
+        # Page navigation
+        nav_col1, nav_col2, _ = st.columns([1, 1, 6])
+        with nav_col1:
+            st.button("◀ Previous", disabled=len(cursors) == 1, on_click=_previous_orders_page)
+        with nav_col2:
+            st.button("Next ▶", disabled=next_cursor is None, on_click=_next_orders_page, args=(next_cursor,))
+    elif orders is not None:
         st.info("No orders found.")
 
 def show_sub_orders():
     st.header("Sub-Orders Management")
     
-    sub_orders = make_api_request("GET", "/sub-orders/")
+    # Filter options (evaluated by the backend)
+    col1, col2 = st.columns(2)
+    with col1:
+        status_filter = st.selectbox("Filter by Status", ["All", "Open", "In-Process", "Closed"], key="sub_status")
+    with col2:
+        ingredient_filter = st.selectbox("Filter by Ingredient", 
+                                       ["All", "carton", "label", "rm", "sterios", "bottles", "m_cups", "caps", "shippers"], 
+                                       key="sub_ingredient")
+    
+    params = {}
+    if status_filter != "All":
+        params["status"] = status_filter
+    if ingredient_filter != "All":
+        params["ingredient_type"] = ingredient_filter
+    
+    sub_orders = make_api_request("GET", "/sub-orders/", params=params)
     
     if sub_orders:
-        df_sub_orders = pd.DataFrame(sub_orders)
-        
-        # Filter options
-        col1, col2 = st.columns(2)
-        with col1:
-            status_filter = st.selectbox("Filter by Status", ["All", "Open", "In-Process", "Closed"], key="sub_status")
-        with col2:
-            ingredient_filter = st.selectbox("Filter by Ingredient", 
-                                           ["All"] + list(df_sub_orders['ingredient_type'].unique()), 
-                                           key="sub_ingredient")
-        
-        # Apply filters
-        filtered_df = df_sub_orders.copy()
-        if status_filter != "All":
-            filtered_df = filtered_df[filtered_df['status'] == status_filter]
-        if ingredient_filter != "All":
-            filtered_df = filtered_df[filtered_df['ingredient_type'] == ingredient_filter]
+        filtered_df = pd.DataFrame(sub_orders)
         
         # Display summary table with key fields
         summary_columns = ['sub_order_id', 'ingredient_type', 'status', 'vendor_company', 'designer_name', 'approved_by_first_name', 'approved_by_last_name']
@@ -428,23 +693,50 @@ def show_sub_orders():
                         st.experimental_rerun()
                     else:
                         st.error("❌ Failed to update sub-order")
+            
+            # Several sub-orders change status in one request (and one UPDATE)
+            st.subheader("📦 Bulk Status Update")
+            with st.form("bulk_sub_order_status"):
+                bulk_ids = st.multiselect("Sub-Orders to update", filtered_df['sub_order_id'].tolist())
+                bulk_status = st.selectbox("New Status", ["Open", "In-Process", "Closed"], index=2)
+                
+                if st.form_submit_button("Update Selected Sub-Orders"):
+                    if not bulk_ids:
+                        st.warning("Select at least one sub-order.")
+                    else:
+                        result = make_api_request("POST", "/sub-orders/bulk-update",
+                                                  {"sub_order_ids": bulk_ids, "changes": {"status": bulk_status}})
+                        if result:
+                            st.success(f"✅ {result['updated']} sub-order(s) set to {bulk_status}")
+                            if result['not_found']:
+                                st.warning(f"{result['not_found']} sub-order(s) no longer exist")
     else:
         st.info("No sub-orders found.")
 
 def show_update_order():
     st.header("Update Order")
     
-    orders = make_api_request("GET", "/orders/")
+    # The selection survives reruns, so its details load alongside the list
+    remembered_id = st.session_state.get("update_order_id")
+    if remembered_id is not None:
+        orders, remembered_order = fetch_concurrently(("GET", "/orders/", None, ORDER_ID_FIELDS),
+                                                      ("GET", f"/orders/{remembered_id}"))
+    else:
+        orders, remembered_order = make_api_request("GET", "/orders/", params=ORDER_ID_FIELDS), None
     
     if orders:
         df_orders = pd.DataFrame(orders)
         
         # Order selection
-        selected_order_id = st.selectbox("Select Order ID to Update", df_orders['order_id'].tolist())
+        selected_order_id = st.selectbox("Select Order ID to Update", df_orders['order_id'].tolist(),
+                                         key="update_order_id")
         
         if selected_order_id:
             # Get current order details
-            current_order = make_api_request("GET", f"/orders/{selected_order_id}")
+            if selected_order_id == remembered_id and remembered_order:
+                current_order = remembered_order
+            else:
+                current_order = make_api_request("GET", f"/orders/{selected_order_id}")
             
             if current_order:
                 st.subheader(f"Updating Order ID: {selected_order_id}")
@@ -621,7 +913,7 @@ def show_update_order():
 def show_update_status():
     st.header("Update Order Status")
     
-    orders = make_api_request("GET", "/orders/")
+    orders = make_api_request("GET", "/orders/", params={"fields": "order_id,status"})
     
     if orders:
         df_orders = pd.DataFrame(orders)
@@ -87,7 +87,7 @@ trap cleanup INT
 
 # Start backend in background
 echo -e "${YELLOW}📡 Starting Backend API...${NC}"
-uvicorn backend.main:app --host 0.0.0.0 --port 8000 --reload &
+uvicorn backend.main:app --host 0.0.0.0 --port 8000 --reload --timeout-graceful-shutdown 5 &
 BACKEND_PID=$!
 
 # Wait for backend to start
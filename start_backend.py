@@ -12,5 +12,7 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=8000,
         reload=True,
-        log_level="info"
+        log_level="info",
+        # Open GET /changes streams would otherwise hold up every reload
+        timeout_graceful_shutdown=5
     )
\ No newline at end of file